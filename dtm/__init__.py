@@ -1,11 +1,83 @@
 from dtm import version
-from datetime import datetime, timedelta
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, tzinfo
+from importlib import import_module
+from operator import (add, eq, floordiv, ge, gt, itemgetter, le, lt,
+                      mod, mul, ne, sub, truediv)
 import os
-try:
-    import pytz
-    import tzlocal
-except ModuleNotFoundError:
-    pass
+import re
+import threading
+import time
+
+
+# -----------------------------------------------------------------------------
+class _LazyModule(object):
+    """
+    Stand-in for a module that isn't imported until one of its attributes is
+    first used. pytz, tzlocal, and numpy all take longer to import than the
+    rest of dtm put together, and many runs (e.g., 'dtm rdt' in a shell
+    pipeline) never touch some or all of them.
+
+    A module marked *optional* may be missing. Its stand-in is false if the
+    import fails, so 'if numpy:' both tests for numpy and triggers the import.
+    """
+
+    # -------------------------------------------------------------------------
+    def __init__(self, name, optional=False):
+        """
+        [class _LazyModule]
+
+        Set up the stand-in for module *name*
+        """
+        self._name = name
+        self._optional = optional
+        self._module = None
+
+    # -------------------------------------------------------------------------
+    def _load(self):
+        """
+        [class _LazyModule]
+
+        Import the module if that hasn't happened yet and return it, or None
+        if it is optional and can't be imported
+        """
+        if self._module is None:
+            try:
+                self._module = import_module(self._name)
+            except ImportError:
+                if not self._optional:
+                    raise
+                self._module = False
+        return self._module or None
+
+    # -------------------------------------------------------------------------
+    def __bool__(self):
+        """
+        [class _LazyModule]
+
+        True if the module can be imported
+        """
+        return self._load() is not None
+
+    # -------------------------------------------------------------------------
+    def __getattr__(self, attr):
+        """
+        [class _LazyModule]
+
+        Import the module on first use and hand back its *attr*
+        """
+        module = self._load()
+        if module is None:
+            raise AttributeError("{} is not installed".format(self._name))
+        return getattr(module, attr)
+
+
+pytz = _LazyModule('pytz')
+tzlocal = _LazyModule('tzlocal')
+zoneinfo = _LazyModule('zoneinfo', optional=True)
+numpy = _LazyModule('numpy', optional=True)
 """
 Epoch values always represent UTC.
 
@@ -64,6 +136,604 @@ def badop_msg(op, left, right):
             .format(left, right))
 
 
+_epoch_ordinal = datetime(1970, 1, 1).toordinal()
+_epoch_naive = datetime(1970, 1, 1)
+
+
+# -----------------------------------------------------------------------------
+def int64_array(values):
+    """
+    Return an int64 array holding *values*: a numpy array if numpy is
+    available, otherwise an array('q').
+    """
+    rval = values if isinstance(values, array) else array('q', values)
+    if numpy:
+        rval = numpy.frombuffer(rval, dtype=numpy.int64)
+    return rval
+
+
+# -----------------------------------------------------------------------------
+def _int64_column(values):
+    """
+    Return *values* (any iterable of ints) as an int64 array (see
+    int64_array()), as is if it already is one
+    """
+    if numpy:
+        return numpy.asarray(values if hasattr(values, '__len__')
+                             else list(values), dtype=numpy.int64)
+    return int64_array(values)
+
+
+# -----------------------------------------------------------------------------
+def _elementwise(func, left, right):
+    """
+    Return func(a, b) for each a in int64 array *left*, with b being *right*
+    if it's a number or the matching item if it's a sequence. numpy does it
+    in one call and returns an array. Otherwise, the result is a list.
+    """
+    if numpy:
+        return func(left, right)
+    if isinstance(right, (int, float)):
+        return [func(_, right) for _ in left]
+    return [func(a, b) for a, b in zip(left, right)]
+
+
+# -----------------------------------------------------------------------------
+def _column_op(func, left, right):
+    """
+    Like _elementwise(), for int results, returned as an int64 array
+    """
+    rval = _elementwise(func, left, right)
+    return rval if numpy else int64_array(rval)
+
+
+# -----------------------------------------------------------------------------
+def _span_seconds(other, count):
+    """
+    Return *other* as seconds: an int for a td, timedelta, int, or float
+    (truncated, as td and dt do), or the int64 array of a TdArray, which
+    must hold *count* durations. If *other* is none of those, return None.
+    """
+    if isinstance(other, td):
+        return other._duration
+    elif isinstance(other, timedelta):
+        return int(other.total_seconds())
+    elif isinstance(other, (int, float)):
+        return int(other)
+    elif isinstance(other, TdArray):
+        if len(other) != count:
+            td._fail("TdArray lengths differ")
+        return other._durations
+    return None
+
+
+# -----------------------------------------------------------------------------
+def utc_epoch(when, offset=0):
+    """
+    Return the integer epoch for naive datetime *when* read as a local time
+    *offset* seconds east of UTC. This is pure arithmetic (no timezone lookup)
+    and truncates microseconds the same way int(datetime.timestamp()) does.
+    """
+    wall = ((when.toordinal() - _epoch_ordinal) * 86400 + when.hour * 3600 +
+            when.minute * 60 + when.second - offset)
+    if when.microsecond:
+        wall = int(wall + when.microsecond / 1e6)
+    return wall
+
+
+# -----------------------------------------------------------------------------
+_iso_rgx = re.compile(r"(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d)"
+                      r"(?::(\d\d)(?:[.,](\d+))?)?"
+                      r"(Z|[+-]\d\d(?::?\d\d)?)?\Z", re.IGNORECASE)
+
+
+# -----------------------------------------------------------------------------
+def iso_parse(spec):
+    """
+    Parse an ISO 8601 / RFC 3339 date and time,
+
+        YYYY-mm-ddTHH:MM[:SS[.ffffff]][Z|+hh:mm|+hhmm|+hh]
+
+    Return None if *spec* isn't in that form. Otherwise return (when, offset),
+    where when is a naive datetime holding the date and time as written and
+    offset is the UTC offset in seconds ('Z' is 0), or None if *spec* doesn't
+    carry one.
+    """
+    found = _iso_rgx.match(spec)
+    if found is None:
+        return None
+    (year, month, day, hour, minute, second, frac, zone) = found.groups()
+    usec = int((frac + "00000")[:6]) if frac else 0
+    try:
+        when = datetime(int(year), int(month), int(day), int(hour),
+                        int(minute), int(second or 0), usec)
+    except ValueError:
+        return None
+    if zone is None:
+        return (when, None)
+    if len(zone) == 1:
+        return (when, 0)
+    (hours, mins) = (int(zone[1:3]), int(zone[-2:]) if 3 < len(zone) else 0)
+    if 24 <= hours or 60 <= mins:
+        return None
+    offset = hours * 3600 + mins * 60
+    return (when, -offset if zone[0] == '-' else offset)
+
+
+# -----------------------------------------------------------------------------
+class FormatMatcher(object):
+    """
+    A list of strptime formats compiled once into a single dispatching
+    matcher. Each format is reduced to a signature (its literal text with each
+    run of digits collapsed to '0') and a regex equivalent to the one strptime
+    would build for it. A dtspec's signature selects the formats that could
+    possibly match it, so we go straight to the right format instead of
+    trying each one in turn and swallowing a ValueError for every miss.
+
+    Formats using directives other than the numeric ones we know how to
+    build (%Y %y %m %d %H %M %S %f) are handed to strptime.
+
+    The matcher counts hits for each format. While *adaptive* is True, a
+    format that wins more often than the ones tried before it is moved ahead
+    of them, but only past formats that can't match the same dtspecs, so the
+    try order adapts to the input without changing which format wins. Set
+    FormatMatcher.adaptive (or the attribute on one matcher) to False for a
+    deterministic try order.
+    """
+
+    adaptive = True
+    _directives = {'Y': (r"(?P<Y>\d\d\d\d)", 4, 4),
+                   'y': (r"(?P<y>\d\d)", 2, 2),
+                   'm': (r"(?P<m>1[0-2]|0[1-9]|[1-9])", 1, 2),
+                   'd': (r"(?P<d>3[0-1]|[1-2]\d|0[1-9]|[1-9])", 1, 2),
+                   'H': (r"(?P<H>2[0-3]|[0-1]\d|\d)", 1, 2),
+                   'M': (r"(?P<M>[0-5]\d|\d)", 1, 2),
+                   'S': (r"(?P<S>6[0-1]|[0-5]\d|\d)", 1, 2),
+                   'f': (r"(?P<f>[0-9]{1,6})", 1, 6),
+                   }
+    _digits = re.compile(r"\d+")
+    _space = re.compile(r"\s+")
+
+    # -------------------------------------------------------------------------
+    def __init__(self, fmts):
+        """
+        [class FormatMatcher]
+
+        Compile each format in *fmts*. The order of *fmts* is the order of
+        precedence when more than one format could match a dtspec.
+        """
+        self.formats = list(fmts)
+        self._entries = [self._compile(idx, fmt)
+                         for idx, fmt in enumerate(self.formats)]
+        self._hits = [0] * len(self.formats)
+        self._dispatch = {}
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def _signature(cls, text):
+        """
+        [class FormatMatcher]
+
+        Reduce *text* to its shape: digit runs become '0', whitespace runs
+        become ' ', and case is ignored (as it is by strptime).
+        """
+        return cls._space.sub(" ", cls._digits.sub("0", text)).lower()
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def _compile(cls, idx, fmt):
+        """
+        [class FormatMatcher]
+
+        Return (idx, fmt, signature, regex, runs) for *fmt*, where runs holds
+        the (min, max) width of each run of digits the format can match. If
+        *fmt* contains a directive we don't build natively, signature, regex,
+        and runs are None and the format is left to strptime.
+        """
+        unknown = (idx, fmt, None, None, None)
+        pattern = ""
+        shape = ""
+        runs = []
+        in_run = False
+        pieces = iter(fmt)
+        for char in pieces:
+            if char == '%':
+                directive = next(pieces, None)
+                if directive == '%':
+                    (rgx, low, high) = ("%", 0, 0)
+                elif directive in cls._directives:
+                    (rgx, low, high) = cls._directives[directive]
+                    char = "0"
+                else:
+                    return unknown
+            elif char.isspace():
+                (rgx, low, high) = (r"\s+", 0, 0)
+            else:
+                (rgx, low, high) = (re.escape(char), 1, 1)
+            pattern += rgx
+            shape += char
+            if char.isdigit() and in_run:
+                runs[-1] = (runs[-1][0] + low, runs[-1][1] + high)
+            elif char.isdigit():
+                runs.append((low, high))
+            in_run = char.isdigit()
+        try:
+            rgx = re.compile(pattern, re.IGNORECASE)
+        except re.error:
+            return unknown
+        return (idx, fmt, cls._signature(shape), rgx, runs)
+
+    # -------------------------------------------------------------------------
+    def _candidates(self, sig):
+        """
+        [class FormatMatcher]
+
+        Return the entries that could match a dtspec with signature *sig*, in
+        the order they should be tried. The first few hundred distinct
+        signatures are remembered.
+        """
+        rval = self._dispatch.get(sig)
+        if rval is None:
+            rval = [_ for _ in self._entries if _[2] in (sig, None)]
+            if len(self._dispatch) < 256:
+                self._dispatch[sig] = rval
+        return rval
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _disjoint(first, second):
+        """
+        [class FormatMatcher]
+
+        True if entries *first* and *second* (which share a signature) can't
+        match the same dtspec because some run of digits can't be the same
+        width for both.
+        """
+        if first[4] is None or second[4] is None:
+            return False
+        return any(a[1] < b[0] or b[1] < a[0]
+                   for a, b in zip(first[4], second[4]))
+
+    # -------------------------------------------------------------------------
+    def _promote(self, sig, cands, pos):
+        """
+        [class FormatMatcher]
+
+        Count a hit for cands[pos]. If we're adaptive, move it ahead of the
+        entries before it that have fewer hits and are disjoint from it. The
+        reordered list replaces the old one rather than being edited in place
+        so threads iterating the old one aren't disturbed.
+        """
+        entry = cands[pos]
+        hits = self._hits
+        hits[entry[0]] += 1
+        if not self.adaptive or pos == 0 or sig not in self._dispatch:
+            return
+        stop = pos
+        while (0 < stop and hits[cands[stop - 1][0]] < hits[entry[0]] and
+               self._disjoint(cands[stop - 1], entry)):
+            stop -= 1
+        if stop < pos:
+            self._dispatch[sig] = (cands[:stop] + [entry] + cands[stop:pos] +
+                                   cands[pos + 1:])
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _build(found):
+        """
+        [class FormatMatcher]
+
+        Construct a datetime from the named groups of regex match *found*,
+        using the same defaults and two digit year pivot as strptime.
+        """
+        fields = found.groupdict()
+        if fields.get('Y'):
+            year = int(fields['Y'])
+        elif fields.get('y'):
+            year = int(fields['y'])
+            year += 2000 if year <= 68 else 1900
+        else:
+            year = 1900
+        usec = fields.get('f')
+        return datetime(year,
+                        int(fields.get('m') or 1),
+                        int(fields.get('d') or 1),
+                        int(fields.get('H') or 0),
+                        int(fields.get('M') or 0),
+                        int(fields.get('S') or 0),
+                        int(usec + "0" * (6 - len(usec))) if usec else 0)
+
+    # -------------------------------------------------------------------------
+    def _parse(self, entry, spec):
+        """
+        [class FormatMatcher]
+
+        Return a datetime parsed from *spec* by *entry*, or None if it doesn't
+        match. Like strptime, a format only matches if it consumes all of
+        *spec*.
+        """
+        (idx, fmt, sig, rgx, runs) = entry
+        try:
+            if rgx is None:
+                return datetime.strptime(spec, fmt)
+            found = rgx.match(spec)
+            if found and found.end() == len(spec):
+                return self._build(found)
+        except ValueError:
+            pass
+        return None
+
+    # -------------------------------------------------------------------------
+    def match(self, spec):
+        """
+        [class FormatMatcher]
+
+        Return a naive datetime parsed from *spec* by the first format that
+        matches it, or None if none of them do.
+        """
+        sig = self._signature(spec)
+        cands = self._candidates(sig)
+        for pos, entry in enumerate(cands):
+            rval = self._parse(entry, spec)
+            if rval is not None:
+                self._promote(sig, cands, pos)
+                return rval
+
+        # Nothing with a matching signature worked. Give strptime itself a
+        # crack at the whole list so we never reject anything it would
+        # accept (e.g., a space padded day of month).
+        for entry in self._entries:
+            try:
+                rval = datetime.strptime(spec, entry[1])
+            except ValueError:
+                continue
+            self._hits[entry[0]] += 1
+            return rval
+        return None
+
+    # -------------------------------------------------------------------------
+    def formats_for(self, spec):
+        """
+        [class FormatMatcher]
+
+        Return the formats that will be tried for *spec*, in try order.
+        """
+        return [_[1] for _ in self._candidates(self._signature(spec))]
+
+    # -------------------------------------------------------------------------
+    def stats(self):
+        """
+        [class FormatMatcher]
+
+        Return a list of (format, hits) tuples in precedence order.
+        """
+        return list(zip(self.formats, self._hits))
+
+
+# -----------------------------------------------------------------------------
+class Formatter(object):
+    """
+    A strftime format compiled once for repeated use. If every directive in
+    the format is one we handle natively (%Y %m %d %H %M %S %F %T %a %Z %z
+    %%), the output is filled in from the broken down local time (year,
+    month, day, ...) computed with integer arithmetic from the epoch plus the
+    UTC offset. No datetime objects are involved. Any other directive makes
+    the formatter hand the whole format to datetime.strftime(), so the output
+    is the same either way.
+
+    A native format is compiled into a two stage %-template. The first stage
+    fills in the fields that only change from day to day (and with the UTC
+    offset) and leaves a second stage template for the hour, minute, and
+    second, so a run of timestamps from the same day only pays for the
+    second stage.
+
+    Each formatter also remembers the second stage templates for the last
+    day_cache_size (local day, offset, zone name) combinations and the
+    strings it rendered for the last second_cache_size (zone, epoch) pairs,
+    evicting the oldest entry when a cache is full, so formatting a stream
+    of increasing timestamps mostly costs a dictionary lookup.
+
+    Use Formatter.get() to fetch the compiled formatter for a format.
+    """
+
+    day_cache_size = 64
+    second_cache_size = 1024
+    _cache = {}
+    _fields = {'Y': [('day', 0, "%d")], 'm': [('day', 1, "%02d")],
+               'd': [('day', 2, "%02d")], 'a': [('day', 3, "%s")],
+               'Z': [('day', 4, "%s")], 'z': [('day', 5, "%s")],
+               'H': [('time', 0, "%02d")], 'M': [('time', 1, "%02d")],
+               'S': [('time', 2, "%02d")], '%': [(None, None, "%%%%")]}
+    _fields['F'] = _fields['Y'] + [(None, None, "-")] + _fields['m'] + \
+        [(None, None, "-")] + _fields['d']
+    _fields['T'] = _fields['H'] + [(None, None, ":")] + _fields['M'] + \
+        [(None, None, ":")] + _fields['S']
+    _wkdays = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+    # -------------------------------------------------------------------------
+    def __init__(self, fmt):
+        """
+        [class Formatter]
+
+        Compile *fmt*. self.native is False if *fmt* uses a directive we
+        don't handle natively.
+        """
+        self.fmt = fmt
+        self.native = False
+        self.uses_z = False
+        pieces = []
+        fields = {'day': [], 'time': []}
+        pos = 0
+        while pos < len(fmt):
+            pct = fmt.find('%', pos)
+            if pct < 0:
+                pct = len(fmt)
+            pieces.append(fmt[pos:pct])
+            if pct == len(fmt):
+                break
+            directive = self._fields.get(fmt[pct + 1:pct + 2])
+            if directive is None:
+                return
+            for (stage, idx, spec) in directive:
+                if stage == 'time':
+                    spec = "%" + spec
+                if stage:
+                    fields[stage].append(idx)
+                pieces.append(spec)
+            self.uses_z = self.uses_z or fmt[pct + 1] == 'z'
+            pos = pct + 2
+        self.native = True
+        self.template = "".join(pieces)
+        self._days = OrderedDict()
+        self._seconds = OrderedDict()
+        self._day_fields = self._getter(fields['day'])
+        self._time_fields = self._getter(fields['time'])
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _getter(indexes):
+        """
+        [class Formatter]
+
+        Return a function that picks the items at *indexes* out of a tuple,
+        ready to be the right operand of %
+        """
+        if not indexes:
+            return lambda fields: ()
+        if len(indexes) == 1:
+            idx = indexes[0]
+            return lambda fields: (fields[idx],)
+        return itemgetter(*indexes)
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _remember(cache, size, key, value):
+        """
+        [class Formatter]
+
+        Store *value* under *key* in *cache*, first evicting the oldest entry
+        if *cache* already holds *size* entries. popitem() is atomic, so
+        threads sharing a formatter can't trip over each other here.
+        """
+        if size <= len(cache):
+            try:
+                cache.popitem(last=False)
+            except KeyError:
+                pass
+        cache[key] = value
+        return value
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def get(cls, fmt):
+        """
+        [class Formatter]
+
+        Return the compiled formatter for *fmt*, compiling it the first time
+        we see it. At most 256 formats are kept.
+        """
+        rval = cls._cache.get(fmt)
+        if rval is None:
+            rval = cls(fmt)
+            if len(cls._cache) < 256:
+                cls._cache[fmt] = rval
+        return rval
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def offset_str(offset):
+        """
+        [class Formatter]
+
+        Render UTC *offset* (seconds) the way %z does: +HHMM, or +HHMMSS if
+        there are leftover seconds
+        """
+        sign = '-' if offset < 0 else '+'
+        (hours, rem) = divmod(abs(offset), 3600)
+        (minutes, seconds) = divmod(rem, 60)
+        if seconds:
+            return "{}{:02d}{:02d}{:02d}".format(sign, hours, minutes, seconds)
+        return "{}{:02d}{:02d}".format(sign, hours, minutes)
+
+    # -------------------------------------------------------------------------
+    def _day_template(self, days, offset, name):
+        """
+        [class Formatter]
+
+        Run the first stage for local day number *days* (since 1970-01-01)
+        in a zone *offset* seconds east of UTC called *name*, returning the
+        template for the second stage
+        """
+        key = (days, offset, name)
+        rval = self._days.get(key)
+        if rval is not None:
+            return rval
+        day = date.fromordinal(days + _epoch_ordinal)
+        fields = (day.year, day.month, day.day, self._wkdays[(days + 3) % 7],
+                  name.replace('%', '%%'),
+                  self.offset_str(offset) if self.uses_z else "")
+        return self._remember(self._days, self.day_cache_size, key,
+                              self.template % self._day_fields(fields))
+
+    # -------------------------------------------------------------------------
+    def format(self, epoch, offset, name):
+        """
+        [class Formatter]
+
+        Return UTC *epoch* formatted as local time in a zone that is *offset*
+        seconds east of UTC and calls itself *name* at that moment. Only for
+        natively handled formats (self.native is True).
+        """
+        (days, secs) = divmod(int(epoch // 1) + offset, 86400)
+        (hour, secs) = divmod(secs, 3600)
+        return (self._day_template(days, offset, name) %
+                self._time_fields((hour,) + divmod(secs, 60)))
+
+    # -------------------------------------------------------------------------
+    def format_at(self, epoch, zone):
+        """
+        [class Formatter]
+
+        Return UTC *epoch* formatted as local time in tzinfo *zone*, reusing
+        the string from last time if we've been asked for this (zone, epoch)
+        recently. Only for natively handled formats.
+        """
+        key = (zone, epoch)
+        rval = self._seconds.get(key)
+        if rval is None:
+            rval = self._remember(self._seconds, self.second_cache_size, key,
+                                  self.format(epoch,
+                                              *ZoneTable.zone_lookup(zone,
+                                                                     epoch)))
+        return rval
+
+    # -------------------------------------------------------------------------
+    def format_many(self, epochs, offsets, names):
+        """
+        [class Formatter]
+
+        Like format(), but for parallel sequences of *epochs*, *offsets*, and
+        *names*, yielding one string per epoch. The first stage only runs
+        again when the local day, offset, or zone name changes, and a
+        repeat of the previous second is the previous string.
+        """
+        time_fields = self._time_fields
+        last = (None, None, None)
+        (prev, row) = (None, None)
+        for key in zip(epochs, offsets, names):
+            if key == prev:
+                yield row
+                continue
+            (epoch, offset, name) = prev = key
+            (days, secs) = divmod(int(epoch // 1) + offset, 86400)
+            if (days, offset, name) != last:
+                last = (days, offset, name)
+                template = self._day_template(*last)
+            (hour, secs) = divmod(secs, 3600)
+            row = template % time_fields((hour,) + divmod(secs, 60))
+            yield row
+
+
 # -----------------------------------------------------------------------------
 class dt(object):
     """
@@ -71,6 +741,7 @@ class dt(object):
     like 'next_day', 'next_weekday', 'weekday_floor', etc.
     """
 
+    __slots__ = ('_utc', '_tz')
     _version = version._v
     _pformats = ["%Y.%m%d",
                  "%Y.%m%d %H:%M:%S",
@@ -83,6 +754,13 @@ class dt(object):
                  "%m/%d/%y %H:%M:%S",
                  "%m/%d/%y",
                  ]
+    _matchers = OrderedDict()
+    _zones = {}
+    _zone_hits = 0
+    _zone_misses = 0
+    _local = None
+    _engine = None
+    _watch_tz = False
 
     # -------------------------------------------------------------------------
     def __init__(self, *args, **kw):
@@ -103,27 +781,91 @@ class dt(object):
         Note that epoch values are always considered to be UTC values.
         """
         tzname = kw['tz'] if 'tz' in kw else None
-        self._tz = dt._static_brew_tz(tzname)
+        object.__setattr__(self, '_tz', dt._static_brew_tz(tzname))
 
         if "epoch" in kw:
-            self._utc = int(kw['epoch'])
+            utc = int(kw['epoch'])
         elif len(args) == 0:
-            self._utc = int(datetime.now().timestamp())
+            utc = int(datetime.now().timestamp())
         elif len(args) == 1:
             if isinstance(args[0], dt):
-                self._utc = args[0]._utc
+                utc = args[0]._utc
             elif isinstance(args[0], datetime):
-                self._utc = int(args[0].timestamp())
+                utc = int(args[0].timestamp())
             elif isinstance(args[0], str):
-                self._utc = self._from_format(args[0])
+                utc = self._from_format(args[0])
             else:
                 dt._fail("single arg must be str, dt, datetime,"
                          " or epoch=<int>")
         elif all(isinstance(_, int) for _ in args):
-            self._utc = self._from_ints(*args)
+            utc = self._from_ints(*args)
         else:
             dt._fail("dt.__init__ expects dt, datetime, str, ints,"
                      " or epoch=<int>")
+        object.__setattr__(self, '_utc', utc)
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def from_epoch(cls, epoch, zone=None):
+        """
+        [class dt]
+
+        Build a dt directly from int *epoch* and timezone object *zone* (the
+        local zone if None), skipping __init__'s argument checks and name
+        lookup. Callers are responsible for passing an int and a resolved
+        zone; dt(epoch=..., tz=...) is the checked way to do the same thing.
+        """
+        rval = object.__new__(cls)
+        object.__setattr__(rval, '_utc', epoch)
+        object.__setattr__(rval, '_tz',
+                           dt._local_zone() if zone is None else zone)
+        return rval
+
+    # -------------------------------------------------------------------------
+    def __setattr__(self, name, value):
+        """
+        [class dt]
+
+        dt objects are immutable
+        """
+        raise AttributeError("dt objects are immutable")
+
+    # -------------------------------------------------------------------------
+    def __delattr__(self, name):
+        """
+        [class dt]
+
+        dt objects are immutable
+        """
+        raise AttributeError("dt objects are immutable")
+
+    # -------------------------------------------------------------------------
+    def __setstate__(self, state):
+        """
+        [class dt]
+
+        Restore *self* from the (None, {slot: value}) *state* pickle and copy
+        hand us, since they can't go through __setattr__
+        """
+        for (name, value) in state[1].items():
+            object.__setattr__(self, name, value)
+
+    # -------------------------------------------------------------------------
+    def __hash__(self):
+        """
+        [class dt]
+
+        Hash as the aware datetime for the same moment does, so a dt hashes
+        like every dt and aware datetime it compares equal to, and not like
+        the int with the same value (which it never equals). A naive
+        datetime's hash can't follow the system zone, so it's left out.
+
+        An aware datetime hashes as the tuple (days, seconds, microseconds)
+        of its UTC time, with days counted from 0001-01-01, so we build that
+        tuple from the epoch rather than building a datetime.
+        """
+        days, secs = divmod(self._utc, 86400)
+        return hash((days + _epoch_ordinal, secs, 0))
 
     # -------------------------------------------------------------------------
     def __add__(self, other):
@@ -133,11 +875,12 @@ class dt(object):
         <dt> + [<int>, <td>, <timedelta>] => <dt>
         """
         if isinstance(other, td):
-            return dt(epoch=self._utc + other._duration)
+            return dt.from_epoch(self._utc + other._duration, self._tz)
         elif isinstance(other, timedelta):
-            return dt(epoch=self._utc + other.total_seconds())
+            return dt.from_epoch(int(self._utc + other.total_seconds()),
+                                 self._tz)
         elif isinstance(other, (int, float)):
-            return dt(epoch=self._utc + int(other))
+            return dt.from_epoch(self._utc + int(other), self._tz)
         else:
             return NotImplemented
 
@@ -159,15 +902,16 @@ class dt(object):
         <dt> - [<td>, <timedelta>, <int>] => <dt>
         """
         if isinstance(other, dt):
-            return td(self._utc - other._utc)
+            return td.from_seconds(self._utc - other._utc)
         elif isinstance(other, datetime):
-            return td(self._utc - other.timestamp())
+            return td.from_seconds(int(self._utc - other.timestamp()))
         elif isinstance(other, td):
-            return dt(epoch=self._utc - other._duration)
+            return dt.from_epoch(self._utc - other._duration, self._tz)
         elif isinstance(other, timedelta):
-            return dt(epoch=self._utc - other.total_seconds())
+            return dt.from_epoch(int(self._utc - other.total_seconds()),
+                                 self._tz)
         elif isinstance(other, (int, float)):
-            return dt(epoch=self._utc - int(other))
+            return dt.from_epoch(self._utc - int(other), self._tz)
         else:
             return NotImplemented
 
@@ -180,7 +924,7 @@ class dt(object):
         [<timedelta>, <td>, <int>] - <dt> => TypeError
         """
         if isinstance(other, datetime):
-            return td(other.timestamp() - self._utc)
+            return td.from_seconds(int(other.timestamp() - self._utc))
         else:
             return NotImplemented
 
@@ -189,24 +933,36 @@ class dt(object):
         """
         [class dt]
 
-        Initialize from a list of my favorite date/time formats. A nice future
-        feature might be a way to easily add new formats to this list, perhapss
-        through a configuration file.
+        Initialize from a list of my favorite date/time formats. More formats
+        can be added with $DTM_FORMATS or register_format() (see
+        FormatRegistry). ISO 8601 date-times are recognized before any of
+        the formats are tried, and one with a UTC offset or Z goes straight
+        to an epoch without consulting self._tz (see iso_parse()).
         """
-        udfmts = self._user_defined_formats()
-        if udfmts:
-            udfmts.extend(self._pformats)
-            self._pformats = udfmts
-        formatted_dt = None
-        for fmt in self._pformats:
-            try:
-                formatted_dt = datetime.strptime(spec, fmt)
-                break
-            except ValueError:
-                pass
+        iso = iso_parse(spec)
+        if iso and iso[1] is not None:
+            return utc_epoch(*iso)
+        formatted_dt = iso[0] if iso else format_registry.matcher().match(spec)
         if formatted_dt is None:
             dt._fail("None of the formats matched '{}'".format(spec))
-        rval = self._norm_loc_ize(formatted_dt).timestamp()
+        rval = int(self._norm_loc_ize(formatted_dt).timestamp())
+        return rval
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _matcher(fmts):
+        """
+        [class dt]
+
+        Return the FormatMatcher for format list *fmts*, compiling it the first
+        time we see that list. At most 256 lists are kept; the oldest is
+        dropped to make room.
+        """
+        key = tuple(fmts)
+        rval = dt._matchers.get(key)
+        if rval is None:
+            rval = Formatter._remember(dt._matchers, 256, key,
+                                       FormatMatcher(key))
         return rval
 
     # -------------------------------------------------------------------------
@@ -216,7 +972,7 @@ class dt(object):
 
         Initialize from a list of ints.
         """
-        return self._norm_loc_ize(datetime(*args)).timestamp()
+        return int(self._norm_loc_ize(datetime(*args)).timestamp())
 
     # -------------------------------------------------------------------------
     @staticmethod
@@ -228,20 +984,46 @@ class dt(object):
         timezone object -> timezone object. This is the static method, which
         can be called from anywhere as long as the dt class is available. It is
         intended for internal use within dt(), hence the leading underscore.
+
+        Names are resolved by the current tz engine (see tz_engine()). Zones
+        resolved by name are cached under the lowercased name, so each
+        spelling of a zone is looked up only once (see zone_cache_info() and
+        zone_cache_clear()).
         """
-        if isinstance(tz, pytz.BaseTzInfo):
+        if isinstance(tz, str) and tz != 'local':
+            rval = dt._zones.get(tz.lower())
+            if rval is None:
+                dt._zone_misses += 1
+                rval = dt._zones[tz.lower()] = tz_engine().zone(tz)
+            else:
+                dt._zone_hits += 1
+        elif isinstance(tz, tzinfo):
             rval = tz
         elif tz == 'local':
-            rval = tzlocal.get_localzone()
-        elif isinstance(tz, str):
-            rval = pytz.timezone(tz)
+            rval = dt._local_zone()
         elif tz is None:
-            rval = tzlocal.get_localzone()
+            rval = dt._local_zone()
         else:
             dt._fail("_static_brew_tz: tz must be timezone, timezone"
                      " name, or None")
         return rval
 
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _local_zone():
+        """
+        [class dt]
+
+        Return the local timezone. tzlocal is only asked the first time, or
+        after refresh_local_zone(). If watch_local_zone() has been turned on,
+        a change in $TZ also triggers a fresh lookup.
+        """
+        local = dt._local
+        if local is None or (dt._watch_tz and
+                             local[0] != os.environ.get('TZ')):
+            local = refresh_local_zone()
+        return local[1]
+
     # -------------------------------------------------------------------------
     def _brew_tz(self, tz):
         """
@@ -259,6 +1041,21 @@ class dt(object):
             rval = dt._static_brew_tz(tz)
         return rval
 
+    # -------------------------------------------------------------------------
+    def _localized(self, tz=None):
+        """
+        [class dt]
+
+        Return an aware datetime holding the time ref of *self* in zone *tz*
+        (default: self._tz), looked up in the zone's ZoneTable when it has
+        one.
+        """
+        zone = self._brew_tz(tz)
+        table = ZoneTable.get(zone)
+        if table is None:
+            return datetime.fromtimestamp(self._utc, zone)
+        return table.datetime(self._utc)
+
     # -------------------------------------------------------------------------
     def __call__(self, *args, tz=None):
         """
@@ -355,9 +1152,7 @@ class dt(object):
         Report the contents of the object. We return the internal epoch
         formatted for human readability.
         """
-        udt = datetime.fromtimestamp(self._utc).astimezone(self._tz)
-        fmt = os.getenv("DTM_DT_STR") or "%F %T %Z"
-        return udt.strftime(fmt)
+        return self._render(display_config.str_formatter)
 
     # -------------------------------------------------------------------------
     def __repr__(self):
@@ -368,15 +1163,17 @@ class dt(object):
         numbers reflect the internal epoch value and we also show the object's
         internal timezone.
         """
-        fmt = os.getenv("DTM_DT_REPR")
-        if fmt:
-            rval = self.strftime(fmt)
+        formatter = display_config.repr_formatter
+        if formatter:
+            rval = self._render(formatter)
         else:
-            rval = "dt({}, tz='{}')".format(int(self._utc), self._tz.zone)
+            rval = "dt({}, tz='{}')".format(int(self._utc),
+                                            TzEngine.zone_name(self._tz))
         return rval
 
     # -------------------------------------------------------------------------
-    def _user_defined_formats(self):
+    @staticmethod
+    def _user_defined_formats():
         """
         [class dt]
 
@@ -394,7 +1191,7 @@ class dt(object):
 
         Return a datetime object containing the time ref and zone of *self*.
         """
-        return datetime.fromtimestamp(self._utc).astimezone(self._tz)
+        return self._localized()
 
     # -------------------------------------------------------------------------
     @staticmethod
@@ -446,7 +1243,7 @@ class dt(object):
         """
         delta = self._duration(*args, seconds=seconds, minutes=minutes,
                                hours=hours, days=days)
-        return dt(epoch=self._utc - delta, tz=self._tz)
+        return dt.from_epoch(int(self._utc - delta), self._tz)
 
     # -------------------------------------------------------------------------
     def increment(self, *args, seconds=None, minutes=None, hours=None,
@@ -465,7 +1262,7 @@ class dt(object):
         """
         delta = self._duration(*args, seconds=seconds, minutes=minutes,
                                hours=hours, days=days)
-        return dt(epoch=self._utc + delta, tz=self._tz)
+        return dt.from_epoch(int(self._utc + delta), self._tz)
 
     # -------------------------------------------------------------------------
     def next_day(self, count=1):
@@ -474,39 +1271,23 @@ class dt(object):
 
         Return the dt that is *count* days after the current object
         """
-        prev_ts = self._utc
-        prev_ldt = datetime.fromtimestamp(self._utc)
-        ts = self._utc
-        for day in range(count):
-            ts = prev_ts + 24 * 3600
-            ldt = self._norm_loc_ize(datetime.fromtimestamp(ts))
-            if self._askew(prev_ldt.hour, ldt.hour):
-                ts += self._delta(prev_ldt.hour, ldt.hour)
-                ldt = self._norm_loc_ize(datetime.fromtimestamp(ts))
-            (prev_ts, prev_ldt) = (ts, ldt)
-
-        return dt(epoch=ts)
-
-    # -------------------------------------------------------------------------
-    def _delta(self, ahour, bhour):
-        """
-        [class dt]
-
-        Figure out the number of seconds to add to the timestamp to fix the dst
-        offset
-        """
-        ax = (ahour + 10) % 24
-        bx = (bhour + 10) % 24
-        return (ax - bx) * 3600
+        return dt.from_epoch(self._shift_days(count), self._tz)
 
     # -------------------------------------------------------------------------
-    def _askew(self, ahour, bhour):
+    def _shift_days(self, count):
         """
         [class dt]
 
-        If there is a dst mismatch, return True, else False
+        Return the epoch *count* calendar days after (before, if *count* is
+        negative) the time ref of *self*, at the same local time in
+        self._tz. The local date and time are found once, moved by *count*
+        days arithmetically, and localized once, so DST only matters at the
+        end point. There, a local time that occurs twice is read as standard
+        time and one that doesn't exist is read with the offset in effect
+        before the gap, as pytz's localize() does by default.
         """
-        return ahour != bhour
+        wall = _wall_seconds(self._tz, self._utc) + 86400 * count
+        return _wall_epoch(self._tz, wall)
 
     # -------------------------------------------------------------------------
     def _norm_loc_ize(self, dtime):
@@ -517,9 +1298,9 @@ class dt(object):
         resulting datetime object
         """
         if dtime.tzinfo:
-            rval = self._tz.normalize(dtime)
+            rval = tz_engine().normalize(self._tz, dtime)
         else:
-            rval = self._tz.normalize(self._tz.localize(dtime))
+            rval = tz_engine().localize(self._tz, dtime)
         return rval
 
     # -------------------------------------------------------------------------
@@ -544,13 +1325,7 @@ class dt(object):
             trgs = [trgs]
         if not isinstance(trgs, list):
             dt._fail("last_weekday requires a string or list")
-        wkdl = self.weekday_list()
-        if any(_ not in wkdl for _ in trgs):
-            dt._fail("one of the targets is not a valid weekday")
-        scan = dt(self.previous_day())
-        while scan.weekday() not in trgs:
-            scan = scan.previous_day()
-        return scan
+        return self._weekday_jump(trgs, 1, -1)
 
     # -------------------------------------------------------------------------
     def next_weekday(self, trgs=None):
@@ -565,13 +1340,30 @@ class dt(object):
             trgs = [trgs]
         if not isinstance(trgs, list):
             dt._fail("next_weekday requires a string or list")
+        return self._weekday_jump(trgs, 1, 1)
+
+    # -------------------------------------------------------------------------
+    def _weekday_jump(self, trgs, first, sign):
+        """
+        [class dt]
+
+        Return the dt for the nearest day at least *first* days away from
+        *self* in direction *sign* (1 forward, -1 back) whose weekday is in
+        *trgs*. The distance is worked out from weekday indexes, so this is
+        one day shift however far the target is.
+        """
         wkdl = self.weekday_list()
         if any(_ not in wkdl for _ in trgs):
             dt._fail("one of the targets is not a valid weekday")
-        scan = dt(self.next_day())
-        while scan.weekday() not in trgs:
-            scan = scan.next_day()
-        return scan
+        wanted = set(wkdl.index(_) for _ in trgs)
+        today = self._weekday_index()
+        count = next((_ for _ in range(first, first + 7)
+                      if (today + sign * _) % 7 in wanted), None)
+        if count is None:
+            dt._fail("no target weekday given")
+        if count == 0:
+            return self
+        return dt.from_epoch(self._shift_days(sign * count), self._tz)
 
     # -------------------------------------------------------------------------
     def previous_day(self, count=1):
@@ -580,40 +1372,39 @@ class dt(object):
 
         Return the dt that is *count* days before current object
         """
-        pts = self._utc
-        pdt = datetime.fromtimestamp(pts)
-        ts = self._utc
-        for day in range(count):
-            ts = pts - 24 * 3600
-            ldt = self._norm_loc_ize(datetime.fromtimestamp(ts))
-            if self._askew(pdt.hour, ldt.hour):
-                ts += self._delta(pdt.hour, ldt.hour)
-                ldt = self._norm_loc_ize(datetime.fromtimestamp(ts))
-            (pts, pdt) = (ts, ldt)
-        return dt(epoch=ts)
+        return dt.from_epoch(self._shift_days(-count), self._tz)
 
     # -------------------------------------------------------------------------
     def dt_range(self, last):
         """
         [class dt]
 
-        Yield each date from self to last, including last.
+        Return a DateRange of each date from self to last, including last.
+        """
+        return DateRange(self, last)
+
+    # -------------------------------------------------------------------------
+    def strftime(self, fmt, tz=None):
+        """
+        [class dt]
+
+        Format the time ref of *self* in zone *tz* (default: self._tz)
+        according to *fmt*. The compiled Formatter for *fmt* does the work if
+        it can. Otherwise, the call is passed down to datetime.
         """
-        tmp = self
-        while tmp <= last:
-            yield tmp
-            tmp = tmp.next_day()
+        return self._render(Formatter.get(fmt), tz)
 
     # -------------------------------------------------------------------------
-    def strftime(self, *args, tz=None):
+    def _render(self, formatter, tz=None):
         """
         [class dt]
 
-        Pass strftime() calls down to datetime
+        Format the time ref of *self* in zone *tz* (default: self._tz) with
+        compiled *formatter*, natively if it can, through datetime otherwise
         """
-        tzobj = self._brew_tz(tz)
-        when = datetime.fromtimestamp(self._utc)
-        return when.astimezone(tzobj).strftime(*args)
+        if not formatter.native:
+            return self._localized(tz).strftime(formatter.fmt)
+        return formatter.format_at(self._utc, self._brew_tz(tz))
 
     # -------------------------------------------------------------------------
     @staticmethod
@@ -628,28 +1419,100 @@ class dt(object):
         """
         zone = dt._static_brew_tz(tz)
         twig = datetime.strptime(args[0], args[1])
-        leaf = zone.normalize(zone.localize(twig))
-        rval = dt(epoch=leaf.astimezone(zone).timestamp())
+        leaf = tz_engine().localize(zone, twig)
+        rval = dt.from_epoch(int(leaf.timestamp()))
         return rval
 
     # -------------------------------------------------------------------------
     @staticmethod
-    def version(**args):
+    def parse_many(specs, fmt=None, tz=None):
         """
         [class dt]
 
-        Return the current version of this class.
+        Parse each dtspec in *specs* (any iterable of strings) and return the
+        corresponding UTC epochs as an int64 array (see int64_array()). If
+        *fmt* is given, every dtspec must match it. Otherwise, the formats dt()
+        would try are used. The timezone and the format matcher are resolved
+        once for the whole batch rather than once per dtspec, and no dt
+        objects are created.
         """
-        return version._v
+        zone = dt._static_brew_tz(tz)
+        engine = tz_engine()
+        if fmt is None:
+            match = format_registry.matcher().match
+        else:
+            match = dt._matcher([fmt]).match
+        offsets = {}
+        rval = array('q')
+        for spec in specs:
+            iso = iso_parse(spec) if fmt is None else None
+            if iso and iso[1] is not None:
+                rval.append(utc_epoch(*iso))
+                continue
+            when = iso[0] if iso else match(spec)
+            if when is None:
+                dt._fail("None of the formats matched '{}'".format(spec))
+            hour = (when.toordinal() - _epoch_ordinal) * 24 + when.hour
+            offset = offsets.get(hour)
+            if offset is None:
+                offset = offsets[hour] = dt._hour_offset(zone, when)
+            if offset is False:
+                rval.append(int(engine.localize(zone, when).timestamp()))
+            else:
+                rval.append(utc_epoch(when, offset))
+        return int64_array(rval)
 
     # -------------------------------------------------------------------------
-    def weekday(self, tz=None):
+    @staticmethod
+    def _hour_offset(zone, when):
         """
         [class dt]
 
-        Return the lowercase abbreviated weekday name for the current object
+        Return the UTC offset (in seconds) that *zone* applies to local times
+        in the hour containing naive datetime *when*, or False if the offset
+        changes during that hour or part of the hour falls in a gap.
         """
-        return self.strftime("%a", tz=tz).lower()
+        localize = tz_engine().localize
+        start = when.replace(minute=0, second=0, microsecond=0)
+        end = start.replace(minute=59, second=59)
+        first = localize(zone, start)
+        last = localize(zone, end)
+        if (first.utcoffset() != last.utcoffset() or
+                first.replace(tzinfo=None) != start or
+                last.replace(tzinfo=None) != end):
+            return False
+        return int(first.utcoffset().total_seconds())
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def version(**args):
+        """
+        [class dt]
+
+        Return the current version of this class.
+        """
+        return version._v
+
+    # -------------------------------------------------------------------------
+    def weekday(self, tz=None):
+        """
+        [class dt]
+
+        Return the lowercase abbreviated weekday name for the current object
+        """
+        return self.weekday_list()[self._weekday_index(tz)]
+
+    # -------------------------------------------------------------------------
+    def _weekday_index(self, tz=None):
+        """
+        [class dt]
+
+        Return the weekday of the time ref in zone *tz* (default: self._tz) as
+        an index into weekday_list(), Monday being 0. Worked out from the
+        local day number, since 1970-01-01 was a Thursday.
+        """
+        offset = ZoneTable.zone_lookup(self._brew_tz(tz), self._utc)[0]
+        return (int(self._utc + offset) // 86400 + 3) % 7
 
     # -------------------------------------------------------------------------
     def weekday_ceiling(self, wkday):
@@ -663,15 +1526,7 @@ class dt(object):
             wkday = [wkday]
         if not isinstance(wkday, list):
             self._fail("weekday_ceiling: argument must be a str or list")
-
-        if self.weekday() in wkday:
-            rval = self
-        else:
-            candy = self.next_day()
-            while candy.weekday() not in wkday:
-                candy = candy.next_day()
-            rval = candy
-        return rval
+        return self._weekday_jump(wkday, 0, 1)
 
     # -------------------------------------------------------------------------
     def weekday_floor(self, wkday):
@@ -685,18 +1540,11 @@ class dt(object):
             wkday = [wkday]
         elif not isinstance(wkday, list):
             self._fail("weekday_floor: argument must be a str or list")
-
-        if self.weekday() in wkday:
-            rval = self
-        else:
-            candy = self.previous_day()
-            while candy.weekday() not in wkday:
-                candy = candy.previous_day()
-            rval = candy
-        return rval
+        return self._weekday_jump(wkday, 0, -1)
 
     # -------------------------------------------------------------------------
-    def weekday_list(self):
+    @staticmethod
+    def weekday_list():
         """
         [class dt]
 
@@ -735,404 +1583,2209 @@ class dt(object):
 
 
 # -----------------------------------------------------------------------------
-class dt_error(Exception):
+class FormatRegistry(object):
     """
-    This object is used to raise exceptions in dt().
+    The formats dt() tries when it's handed a dtspec string. In order of
+    precedence, these are the formats listed in $DTM_FORMATS (separated by
+    ';'), the formats added with register(), and the default formats.
+
+    The list is compiled into a FormatMatcher once and the matcher is reused
+    until the list changes, either because a format was registered or because
+    the value of $DTM_FORMATS is different from the one the matcher was built
+    for. The environment value and its matcher are kept together in a single
+    tuple, so a thread reading them never sees one without the other, and
+    rebuilds are serialized by a lock. Many threads can parse dtspecs at once.
     """
-    pass
 
+    # -------------------------------------------------------------------------
+    def __init__(self, defaults):
+        """
+        [class FormatRegistry]
+
+        Start with the list *defaults* (which is referenced, not copied) and
+        nothing registered.
+        """
+        self._defaults = defaults
+        self._registered = []
+        self._lock = threading.Lock()
+        self._state = None
+
+    # -------------------------------------------------------------------------
+    def formats(self):
+        """
+        [class FormatRegistry]
+
+        Return the formats currently in effect, in order of precedence
+        """
+        return self.matcher().formats
+
+    # -------------------------------------------------------------------------
+    def matcher(self):
+        """
+        [class FormatRegistry]
+
+        Return the FormatMatcher for the formats currently in effect,
+        rebuilding it if the registry or $DTM_FORMATS has changed.
+        """
+        env = os.environ.get("DTM_FORMATS")
+        state = self._state
+        if state is None or state[0] != env:
+            with self._lock:
+                state = self._state
+                if state is None or state[0] != env:
+                    fmts = dt._user_defined_formats() or []
+                    fmts.extend(self._registered)
+                    fmts.extend(self._defaults)
+                    state = self._state = (env, FormatMatcher(fmts))
+        return state[1]
+
+    # -------------------------------------------------------------------------
+    def register(self, fmt):
+        """
+        [class FormatRegistry]
+
+        Add strptime format *fmt* after any registered earlier and ahead of
+        the defaults.
+        """
+        if not isinstance(fmt, str):
+            dt._fail("register_format: fmt must be a str")
+        with self._lock:
+            if fmt not in self._registered:
+                self._registered.append(fmt)
+            self._state = None
+
+    # -------------------------------------------------------------------------
+    def reload(self):
+        """
+        [class FormatRegistry]
+
+        Discard the compiled matcher so the next parse re-reads $DTM_FORMATS
+        and recompiles everything (e.g., after changing dt._pformats).
+        """
+        with self._lock:
+            self._state = None
+
+
+format_registry = FormatRegistry(dt._pformats)
+
+
+# -----------------------------------------------------------------------------
+def register_format(fmt):
+    """
+    Add strptime format *fmt* to the formats dt() tries when parsing a
+    dtspec. Registered formats are tried before the defaults.
+    """
+    format_registry.register(fmt)
+
+
+# -----------------------------------------------------------------------------
+def reload_formats():
+    """
+    Re-read $DTM_FORMATS and recompile the formats dt() uses for parsing
+    """
+    format_registry.reload()
+
+
+# -----------------------------------------------------------------------------
+class DisplayConfig(object):
+    """
+    The formats str() and repr() use for dt objects: $DTM_DT_STR (default:
+    '%F %T %Z') and $DTM_DT_REPR (default: the dt(<epoch>, tz='<zone>')
+    form). The environment is read and the formats compiled when dtm is
+    imported and again only when reload() is called, so rendering a dt
+    costs no environment lookups.
+    """
+
+    # -------------------------------------------------------------------------
+    def __init__(self):
+        """
+        [class DisplayConfig]
+
+        Load the formats from the environment
+        """
+        self.reload()
+
+    # -------------------------------------------------------------------------
+    def reload(self):
+        """
+        [class DisplayConfig]
+
+        Read $DTM_DT_STR and $DTM_DT_REPR again. repr_formatter is None if
+        $DTM_DT_REPR is unset or empty.
+        """
+        self.str_formatter = Formatter.get(os.getenv("DTM_DT_STR") or
+                                           "%F %T %Z")
+        fmt = os.getenv("DTM_DT_REPR")
+        self.repr_formatter = Formatter.get(fmt) if fmt else None
+
+
+display_config = DisplayConfig()
+
+
+# -----------------------------------------------------------------------------
+def reload_display():
+    """
+    Have dt pick up changes to $DTM_DT_STR and $DTM_DT_REPR
+    """
+    display_config.reload()
+
+
+# -----------------------------------------------------------------------------
+def zone_cache_info():
+    """
+    Report the hits, misses, and size of the cache dt uses to resolve
+    timezone names
+    """
+    return {'hits': dt._zone_hits, 'misses': dt._zone_misses,
+            'size': len(dt._zones)}
+
+
+# -----------------------------------------------------------------------------
+def zone_cache_clear():
+    """
+    Empty the cache dt uses to resolve timezone names and zero its counters
+    """
+    dt._zones.clear()
+    dt._zone_hits = dt._zone_misses = 0
+
+
+# -----------------------------------------------------------------------------
+def refresh_local_zone():
+    """
+    Look up the local timezone again (dt normally does so only once per
+    process), telling tzlocal and the C library to do the same. Returns the
+    ($TZ, zone) pair dt will use from now on.
+    """
+    if hasattr(time, 'tzset'):
+        time.tzset()
+    if hasattr(tzlocal, 'reload_localzone'):
+        tzlocal.reload_localzone()
+    dt._local = (os.environ.get('TZ'), tz_engine().local())
+    return dt._local
+
+
+# -----------------------------------------------------------------------------
+def watch_local_zone(enable=True):
+    """
+    If *enable*, have dt compare $TZ with the value it had when the local
+    timezone was looked up each time the local timezone is needed, and look
+    it up again when they differ. This is for long-running processes whose
+    local zone can really change. It is off by default.
+    """
+    dt._watch_tz = bool(enable)
+
+
+# -----------------------------------------------------------------------------
+class ZoneTable(object):
+    """
+    The UTC offsets and abbreviations a pytz timezone uses over time, taken
+    from the zone's own _utc_transition_times and _transition_info and laid
+    out as flat arrays. starts[i] is the epoch at which offsets[i] (seconds
+    east of UTC) and names[i] take effect, so the offset in effect at any
+    epoch is one bisect over an int64 array away. A zone with a fixed offset
+    has a single entry.
+
+    Tables are built once per zone. Use ZoneTable.get() to fetch one.
+    """
+
+    _tables = {}
+    _vectors = None
+
+    # -------------------------------------------------------------------------
+    def __init__(self, zone):
+        """
+        [class ZoneTable]
+
+        Build the table for pytz timezone *zone*
+        """
+        self.zone = zone
+        if getattr(zone, '_utc_transition_times', None):
+            infos = zone._transition_info
+            self.starts = array('q', [utc_epoch(_)
+                                      for _ in zone._utc_transition_times])
+            self.offsets = array('q', [int(_[0].total_seconds())
+                                       for _ in infos])
+            self.names = [_[2] for _ in infos]
+            self.dsts = [bool(_[1]) for _ in infos]
+            self.tzinfos = [zone._tzinfos[_] for _ in infos]
+        else:
+            sample = datetime(2000, 1, 1)
+            self.starts = array('q', [utc_epoch(datetime.min)])
+            self.offsets = array('q', [int(zone.utcoffset(sample)
+                                           .total_seconds())])
+            self.names = [zone.tzname(sample)]
+            self.dsts = [False]
+            self.tzinfos = [zone]
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def get(cls, zone):
+        """
+        [class ZoneTable]
+
+        Return the table for *zone*, building it the first time it's asked
+        for, or None if *zone* isn't a pytz timezone.
+        """
+        rval = cls._tables.get(zone)
+        if rval is None:
+            if not _is_pytz(zone):
+                return None
+            rval = cls._tables[zone] = cls(zone)
+        return rval
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def zone_lookup(cls, zone, epoch):
+        """
+        [class ZoneTable]
+
+        Return (offset, abbreviation) in effect at *epoch* in *zone*, which
+        can be any tzinfo. pytz zones are looked up in their table. Others
+        are asked through datetime.
+        """
+        table = cls.get(zone)
+        if table is None:
+            when = datetime.fromtimestamp(epoch, zone)
+            return (int(when.utcoffset().total_seconds()), when.tzname())
+        return table.lookup(epoch)
+
+    # -------------------------------------------------------------------------
+    def index(self, epoch):
+        """
+        [class ZoneTable]
+
+        Return the index of the entry in effect at *epoch*
+        """
+        return max(0, bisect_right(self.starts, epoch) - 1)
+
+    # -------------------------------------------------------------------------
+    def lookup(self, epoch):
+        """
+        [class ZoneTable]
+
+        Return (offset, abbreviation) in effect at *epoch*
+        """
+        idx = self.index(epoch)
+        return (self.offsets[idx], self.names[idx])
+
+    # -------------------------------------------------------------------------
+    def offset(self, epoch):
+        """
+        [class ZoneTable]
+
+        Return the UTC offset (seconds east of UTC) in effect at *epoch*
+        """
+        return self.offsets[self.index(epoch)]
+
+    # -------------------------------------------------------------------------
+    def wall_offset(self, wall):
+        """
+        [class ZoneTable]
+
+        Return the UTC offset that applies to local wall clock time *wall*
+        (seconds since 1970-01-01 00:00:00 local), so the epoch is wall -
+        offset. Ambiguous and nonexistent wall times are resolved the way
+        pytz's localize() does by default (is_dst=False): of the readings
+        that occur, the standard time one wins if there's just one,
+        otherwise the later; a wall time in a gap takes the offset of the
+        wall time six hours earlier (the one in effect before the gap).
+        """
+        found = {}
+        for idx in (self.index(wall - 86400), self.index(wall + 86400)):
+            epoch = wall - self.offsets[idx]
+            now = self.index(epoch)
+            if self.offsets[now] == self.offsets[idx]:
+                found[epoch] = self.dsts[now]
+        if not found:
+            return self.wall_offset(wall - 21600)
+        return wall - _pick_epoch(found.items())
+
+    # -------------------------------------------------------------------------
+    def index_many(self, epochs):
+        """
+        [class ZoneTable]
+
+        Return the indexes of the entries in effect at each of *epochs* as an
+        int64 array (see int64_array()). With numpy, this is a single
+        searchsorted over the transition starts. Without it, it's a bisect
+        per epoch.
+        """
+        if not numpy:
+            starts = self.starts
+            return int64_array(max(0, bisect_right(starts, _) - 1)
+                               for _ in epochs)
+        if self._vectors is None:
+            self._vectors = (numpy.frombuffer(self.starts, dtype=numpy.int64),
+                             numpy.frombuffer(self.offsets,
+                                              dtype=numpy.int64),
+                             numpy.array(self.dsts, dtype=bool))
+        epochs = numpy.asarray(epochs if hasattr(epochs, '__len__')
+                               else list(epochs), dtype=numpy.int64)
+        idx = numpy.searchsorted(self._vectors[0], epochs, side='right') - 1
+        return numpy.maximum(idx, 0)
+
+    # -------------------------------------------------------------------------
+    def offset_many(self, epochs):
+        """
+        [class ZoneTable]
+
+        Return the UTC offsets in effect at each of *epochs* as an int64 array
+        (see index_many())
+        """
+        idx = self.index_many(epochs)
+        if not numpy:
+            offsets = self.offsets
+            return int64_array(offsets[_] for _ in idx)
+        return self._vectors[1][idx]
+
+    # -------------------------------------------------------------------------
+    def wall_offset_many(self, walls):
+        """
+        [class ZoneTable]
+
+        Like wall_offset(), for each of the local wall clock times in *walls*,
+        returning an int64 array. With numpy, every wall time is settled at
+        once: the two readings (one per entry in effect a day either side)
+        are checked and chosen between with array operations, and the few
+        wall times in a gap go around again six hours earlier.
+        """
+        if not numpy:
+            return int64_array(self.wall_offset(_) for _ in walls)
+        walls = numpy.asarray(walls, dtype=numpy.int64)
+        low = self.index_many(walls - 86400)
+        high = self.index_many(walls + 86400)
+        offsets, dsts = self._vectors[1:]
+        low_epoch = walls - offsets[low]
+        high_epoch = walls - offsets[high]
+        low_now = self.index_many(low_epoch)
+        high_now = self.index_many(high_epoch)
+        low_ok = offsets[low_now] == offsets[low]
+        high_ok = offsets[high_now] == offsets[high]
+        epoch = numpy.where(low_ok, low_epoch, high_epoch)
+        both = low_ok & high_ok & (low_epoch != high_epoch)
+        take_high = numpy.where(dsts[low_now] != dsts[high_now],
+                                dsts[low_now], low_epoch < high_epoch)
+        epoch = numpy.where(both & take_high, high_epoch, epoch)
+        rval = walls - epoch
+        gaps = ~(low_ok | high_ok)
+        if gaps.any():
+            rval[gaps] = self.wall_offset_many(walls[gaps] - 21600)
+        return rval
+
+    # -------------------------------------------------------------------------
+    def datetime(self, epoch):
+        """
+        [class ZoneTable]
+
+        Return an aware datetime for *epoch* in this zone. This is the same
+        object datetime.fromtimestamp(epoch).astimezone(zone) would produce,
+        minus the system local time round trip and pytz's own search.
+        """
+        idx = self.index(epoch)
+        when = _epoch_naive + timedelta(seconds=epoch + self.offsets[idx])
+        return when.replace(tzinfo=self.tzinfos[idx])
+
+
+# -----------------------------------------------------------------------------
+def _is_pytz(zone):
+    """
+    pytz zones are the ones with a localize() method. Checking for that
+    rather than isinstance(zone, pytz.BaseTzInfo) saves importing pytz just
+    to find out a zone didn't come from it.
+    """
+    return hasattr(zone, 'localize')
+
+
+# -----------------------------------------------------------------------------
+def _pick_epoch(readings):
+    """
+    Given the (epoch, is_dst) readings of a local time that occurs more
+    than once, return the epoch pytz's localize() picks by default
+    (is_dst=False): the only standard time one, if there is exactly one,
+    otherwise the latest
+    """
+    readings = list(readings)
+    standard = [_ for _ in readings if not _[1]]
+    if len(standard) == 1:
+        return standard[0][0]
+    return max(_[0] for _ in standard or readings)
+
+
+# -----------------------------------------------------------------------------
+class TzEngine(object):
+    """
+    A timezone engine resolves timezone names (and the local zone) to tzinfo
+    objects and turns naive local times into aware ones. dt does all of its
+    timezone work through the current engine (see tz_engine() and
+    set_tz_engine()).
+
+    The engines can handle each other's zones, so dt objects made before a
+    switch keep working. localize() and normalize() go by the kind of zone
+    they're given: pytz zones need pytz's localize()/normalize() steps, other
+    tzinfo objects (zoneinfo, datetime.timezone) only need fold.
+    """
+
+    name = None
+
+    # -------------------------------------------------------------------------
+    def zone(self, name):
+        """
+        [class TzEngine]
+
+        Return the timezone called *name* (case doesn't matter). This
+        default resolves it with pytz, so an engine only needs to override
+        the steps it does differently.
+        """
+        return pytz.timezone(name)
+
+    # -------------------------------------------------------------------------
+    def local(self):
+        """
+        [class TzEngine]
+
+        Return the local timezone as reported by tzlocal
+        """
+        return tzlocal.get_localzone()
+
+    # -------------------------------------------------------------------------
+    def localize(self, zone, when):
+        """
+        [class TzEngine]
+
+        Return naive local time *when* as an aware, normalized datetime in
+        *zone*. Where the local time is ambiguous or doesn't exist, the
+        result is the one pytz's localize() gives by default (is_dst=False).
+        """
+        if _is_pytz(zone):
+            return zone.normalize(zone.localize(when))
+        first = when.replace(tzinfo=zone)
+        if first.utcoffset() == first.replace(fold=1).utcoffset():
+            return first
+        return zone.fromutc(self._naive_utc(zone, when).replace(tzinfo=zone))
+
+    # -------------------------------------------------------------------------
+    def _naive_utc(self, zone, when):
+        """
+        [class TzEngine]
+
+        Return the naive UTC time pytz's rules (see localize()) assign to
+        naive local time *when* in non-pytz *zone*. A time in a gap is read
+        with the offset of the time six hours earlier, as pytz does.
+        """
+        found = {}
+        for fold in (0, 1):
+            utc = when - when.replace(tzinfo=zone, fold=fold).utcoffset()
+            local = zone.fromutc(utc.replace(tzinfo=zone))
+            if local.replace(tzinfo=None, fold=0) == when:
+                found[utc] = bool(local.dst())
+        if not found:
+            hours = timedelta(hours=6)
+            return self._naive_utc(zone, when - hours) + hours
+        return _pick_epoch(found.items())
+
+    # -------------------------------------------------------------------------
+    def normalize(self, zone, when):
+        """
+        [class TzEngine]
+
+        Return aware datetime *when* converted to *zone*
+        """
+        if _is_pytz(zone):
+            return zone.normalize(when)
+        return when.astimezone(zone)
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def zone_name(zone):
+        """
+        [class TzEngine]
+
+        Return the name of *zone*: its pytz zone or zoneinfo key if it has
+        one, otherwise str(zone)
+        """
+        return (getattr(zone, 'zone', None) or getattr(zone, 'key', None) or
+                str(zone))
+
+
+# -----------------------------------------------------------------------------
+class PytzEngine(TzEngine):
+    """
+    Resolve names with pytz. This is the default engine.
+    """
+
+    name = 'pytz'
+
+
+# -----------------------------------------------------------------------------
+class TableEngine(PytzEngine):
+    """
+    Resolve names with pytz but localize pytz zones with arithmetic on the
+    zone's ZoneTable instead of pytz's localize() and normalize(), which
+    search the zone's transitions several times per call.
+    """
+
+    name = 'table'
+
+    # -------------------------------------------------------------------------
+    def localize(self, zone, when):
+        """
+        [class TableEngine]
+
+        Like TzEngine.localize(), but for pytz zones, find the offset with
+        ZoneTable.wall_offset()
+        """
+        table = ZoneTable.get(zone)
+        if table is None:
+            return TzEngine.localize(self, zone, when)
+        wall = ((when.toordinal() - _epoch_ordinal) * 86400 +
+                when.hour * 3600 + when.minute * 60 + when.second)
+        offset = table.wall_offset(wall)
+        idx = table.index(wall - offset)
+        when += timedelta(seconds=table.offsets[idx] - offset)
+        return when.replace(tzinfo=table.tzinfos[idx])
+
+    # -------------------------------------------------------------------------
+    def normalize(self, zone, when):
+        """
+        [class TableEngine]
+
+        Like TzEngine.normalize(), but for pytz zones, use the zone's
+        ZoneTable
+        """
+        table = ZoneTable.get(zone)
+        if table is None:
+            return TzEngine.normalize(self, zone, when)
+        utc = when.replace(tzinfo=None) - when.utcoffset()
+        epoch = (utc.toordinal() - _epoch_ordinal) * 86400 + (
+            utc.hour * 3600 + utc.minute * 60 + utc.second)
+        idx = table.index(epoch)
+        utc += timedelta(seconds=table.offsets[idx])
+        return utc.replace(tzinfo=table.tzinfos[idx])
+
+
+# -----------------------------------------------------------------------------
+class ZoneinfoEngine(TzEngine):
+    """
+    Resolve names with the standard library's zoneinfo module (Python 3.9+).
+    zoneinfo zones work with plain datetime arithmetic, so localizing them
+    is a replace() rather than pytz's localize() and normalize() steps.
+    """
+
+    name = 'zoneinfo'
+
+    # -------------------------------------------------------------------------
+    def __init__(self):
+        """
+        [class ZoneinfoEngine]
+
+        Check that zoneinfo is available
+        """
+        if not zoneinfo:
+            dt._fail("the zoneinfo tz engine requires Python 3.9 or later")
+        self._keys = None
+
+    # -------------------------------------------------------------------------
+    def zone(self, name):
+        """
+        [class ZoneinfoEngine]
+
+        Return the zoneinfo timezone called *name*. Like pytz, we don't care
+        about case, but zoneinfo does, so if *name* isn't found as given, we
+        look it up in a map of the lowercased names of all available zones.
+        """
+        try:
+            return zoneinfo.ZoneInfo(name)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            if self._keys is None:
+                self._keys = {_.lower(): _
+                              for _ in zoneinfo.available_timezones()}
+            if name.lower() not in self._keys:
+                raise
+            return zoneinfo.ZoneInfo(self._keys[name.lower()])
+
+    # -------------------------------------------------------------------------
+    def local(self):
+        """
+        [class ZoneinfoEngine]
+
+        Return the zoneinfo version of the local zone tzlocal reports, or
+        what tzlocal reports if zoneinfo doesn't know it by that name
+        """
+        zone = tzlocal.get_localzone()
+        try:
+            return self.zone(self.zone_name(zone))
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            return zone
+
+
+# -----------------------------------------------------------------------------
+_tz_engines = {'pytz': PytzEngine, 'table': TableEngine,
+               'zoneinfo': ZoneinfoEngine}
+
+
+# -----------------------------------------------------------------------------
+def tz_engine():
+    """
+    Return the current timezone engine. Until set_tz_engine() is called, this
+    is the one named by $DTM_TZ_ENGINE, or pytz if that's not set.
+    """
+    return dt._engine or set_tz_engine()
+
+
+# -----------------------------------------------------------------------------
+def set_tz_engine(name=None):
+    """
+    Make the engine called *name* ('pytz', 'table', 'zoneinfo', or one added
+    with register_tz_engine()) the current timezone engine and return it. If
+    *name* is None, use $DTM_TZ_ENGINE, or pytz if that's not set. Timezone
+    names and the local zone will be resolved anew by the new engine.
+    """
+    name = name or os.getenv("DTM_TZ_ENGINE") or 'pytz'
+    if name not in _tz_engines:
+        dt._fail("unknown tz engine '{}' (expected one of {})"
+                 .format(name, ", ".join(sorted(_tz_engines))))
+    engine = _tz_engines[name]()
+    dt._zones.clear()
+    dt._local = None
+    dt._engine = engine
+    return engine
+
+
+# -----------------------------------------------------------------------------
+def register_tz_engine(name, cls):
+    """
+    Make TzEngine subclass *cls* available to set_tz_engine() and
+    $DTM_TZ_ENGINE as *name*
+    """
+    if not (isinstance(cls, type) and issubclass(cls, TzEngine)):
+        dt._fail("register_tz_engine: cls must be a TzEngine subclass")
+    _tz_engines[name] = cls
+
+
+# -----------------------------------------------------------------------------
+def _wall_seconds(zone, epoch):
+    """
+    Return local wall clock seconds (seconds since 1970-01-01 00:00:00 local)
+    in tzinfo *zone* for UTC *epoch*
+    """
+    return epoch + ZoneTable.zone_lookup(zone, epoch)[0]
+
+
+# -----------------------------------------------------------------------------
+def _wall_epoch(zone, wall):
+    """
+    Return the UTC epoch for local wall clock seconds *wall* in tzinfo
+    *zone*. Wall times that occur twice or not at all are resolved as
+    ZoneTable.wall_offset() describes.
+    """
+    table = ZoneTable.get(zone)
+    if table is None:
+        when = _epoch_naive + timedelta(seconds=wall)
+        return int(tz_engine().localize(zone, when).timestamp())
+    return wall - table.wall_offset(wall)
+
+
+# -----------------------------------------------------------------------------
+def localize_many(epochs, tz=None, offsets=False):
+    """
+    Convert each UTC epoch in *epochs* (any iterable of ints, ideally an
+    int64 array) to local wall clock seconds in *tz* -- the epoch plus the
+    UTC offset in effect -- and return them as an int64 array. If *offsets*
+    is True, return the UTC offsets themselves instead. Dividing the wall
+    clock seconds by 86400 yields local day numbers, which is what daily
+    rollups want.
+    """
+    zone = dt._static_brew_tz(tz)
+    if numpy:
+        epochs = numpy.asarray(epochs if hasattr(epochs, '__len__')
+                               else list(epochs), dtype=numpy.int64)
+    elif not isinstance(epochs, array):
+        epochs = array('q', epochs)
+    table = ZoneTable.get(zone)
+    if table is not None:
+        rval = table.offset_many(epochs)
+        if offsets:
+            return rval
+        if numpy:
+            return rval + epochs
+        return int64_array(e + o for e, o in zip(epochs, rval))
+    rval = array('q')
+    for epoch in epochs:
+        when = datetime.fromtimestamp(epoch).astimezone(zone)
+        offset = int(when.utcoffset().total_seconds())
+        rval.append(offset if offsets else epoch + offset)
+    return int64_array(rval)
+
+
+# -----------------------------------------------------------------------------
+def format_many(epochs, fmt="%F-%T", tz=None, out=None, sep="\n"):
+    """
+    Format each UTC epoch in *epochs* (any iterable of ints, ideally an int64
+    array) according to strftime format *fmt* as a local time in zone *tz*.
+    The zone is resolved and the format compiled once for the whole batch
+    (see Formatter), and no dt objects are created.
+
+    Return the strings in a list, or if *out* (anything with a write() method,
+    like a file or io.StringIO) is given, write each one to *out* followed by
+    *sep* and return the number written.
+    """
+    zone = dt._static_brew_tz(tz)
+    formatter = Formatter.get(fmt)
+    if hasattr(epochs, 'tolist'):
+        epochs = epochs.tolist()
+    elif not isinstance(epochs, (list, tuple)):
+        epochs = list(epochs)
+    table = ZoneTable.get(zone)
+    if not formatter.native:
+        if table is None:
+            whens = (datetime.fromtimestamp(_, zone) for _ in epochs)
+        else:
+            whens = (table.datetime(_) for _ in epochs)
+        rows = (_.strftime(fmt) for _ in whens)
+    elif table is None:
+        whens = [datetime.fromtimestamp(_, zone) for _ in epochs]
+        rows = formatter.format_many(
+            epochs, [int(_.utcoffset().total_seconds()) for _ in whens],
+            [_.tzname() for _ in whens])
+    else:
+        idx = table.index_many(epochs)
+        idx = idx.tolist() if hasattr(idx, 'tolist') else idx
+        rows = formatter.format_many(epochs, [table.offsets[_] for _ in idx],
+                                     [table.names[_] for _ in idx])
+    if out is None:
+        return list(rows)
+    count = 0
+    for row in rows:
+        out.write(row)
+        out.write(sep)
+        count += 1
+    return count
+
+
+# -----------------------------------------------------------------------------
+def date_grid(start, stop, step=1, tz=None):
+    """
+    Return the UTC epochs from *start* to *stop*, inclusive, *step* apart in
+    zone *tz* as an int64 array (see int64_array()). *start* and *stop* can
+    be dt objects or dtspecs like "2019.0310 06:00:00", read in *tz*.
+
+    *step* works as it does for DateRange. An int counts calendar days, so
+    a weekly grid (step=7) stays at the same local time of day across DST
+    changes. A td is an exact number of seconds, so an hourly or 15 minute
+    grid has one point per real interval: none in a spring gap, and both
+    copies of a repeated fall hour.
+    """
+    zone = dt._static_brew_tz(tz)
+    ends = [dt.from_epoch(_._utc, zone) if isinstance(_, dt)
+            else dt(_, tz=zone) for _ in (start, stop)]
+    return DateRange(ends[0], ends[1], step).epochs()
+
+
+# -----------------------------------------------------------------------------
+class dt_error(Exception):
+    """
+    This object is used to raise exceptions in dt().
+    """
+    pass
+
+
+# -----------------------------------------------------------------------------
+def count_in(dct, seq):
+    """
+    Count the number of items in *seq* that are in *dct*. This is used to
+    decide whether multiple forms of keyword arguments are used in the td
+    constructor. For example, the user should not provide both 's' and 'secs'.
+    """
+    return sum([1 for _ in seq if _ in dct])
+
+
+# -----------------------------------------------------------------------------
+class td(object):
+    """
+    This object represents a period of time, stored as a number of seconds.
+    """
+
+    __slots__ = ('_duration',)
+
+    # -------------------------------------------------------------------------
+    def __init__(self, *args, **kw):
+        """
+        [class td]
+
+        Argument formats:
+            ([[[days,] hours,] minutes,] seconds)
+            {'s': <int>,         # seconds
+             'secs': <int>,
+             'seconds': <int>,
+             'm': <int>,         # minutes
+             'mins': <int>,
+             'minutes': <int>,
+             'h': <int>,         # hours
+             'hrs': <int>,
+             'hours': <int>,
+             'd': <int>,         # days
+             'days': <int>,
+            }
+        """
+        sunits = ['s', 'secs', 'seconds']
+        munits = ['m', 'mins', 'minutes']
+        hunits = ['h', 'hrs', 'hours']
+        dunits = ['d', 'days']
+        if len(args) == 0:
+            if 1 < count_in(kw, sunits):
+                self._fail("Mutually exclusive arguments: s, secs, seconds")
+            elif 1 < count_in(kw, ['m', 'mins', 'minutes']):
+                self._fail("Mutually exclusive arguments: m, mins, minutes")
+            elif 1 < count_in(kw, ['h', 'hrs', 'hours']):
+                self._fail("Mutually exclusive arguments: h, hrs, hours")
+            elif 1 < count_in(kw, ['d', 'days']):
+                self._fail("Mutually exclusive arguments: d, days")
+
+            secs = kw.get('s') or kw.get('secs') or kw.get('seconds') or 0
+            mins = kw.get('m') or kw.get('mins') or kw.get('minutes') or 0
+            hours = kw.get('h') or kw.get('hrs') or kw.get('hours') or 0
+            days = kw.get('d') or kw.get('days') or 0
+
+            duration = secs + 60 * (mins + (60 * (hours + 24 * days)))
+        elif any([_ in kw for _ in sunits + munits + hunits + dunits]):
+            self._fail("Expected either *args or *kw, not both")
+        elif isinstance(args[0], timedelta):
+            duration = args[0].total_seconds()
+        else:
+            largs = list(args)
+            mult = [24*3600, 3600, 60]
+            duration = largs.pop()
+            while largs:
+                duration = duration + mult.pop() * largs.pop()
+        object.__setattr__(self, '_duration', int(duration))
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def from_seconds(cls, seconds):
+        """
+        [class td]
+
+        Build a td directly from int *seconds*, skipping __init__'s argument
+        checks. td(seconds) is the checked way to do the same thing.
+        """
+        rval = object.__new__(cls)
+        object.__setattr__(rval, '_duration', seconds)
+        return rval
+
+    # -------------------------------------------------------------------------
+    def __setattr__(self, name, value):
+        """
+        [class td]
+
+        td objects are immutable
+        """
+        raise AttributeError("td objects are immutable")
+
+    # -------------------------------------------------------------------------
+    def __delattr__(self, name):
+        """
+        [class td]
+
+        td objects are immutable
+        """
+        raise AttributeError("td objects are immutable")
+
+    # -------------------------------------------------------------------------
+    def __setstate__(self, state):
+        """
+        [class td]
+
+        Restore *self* from the (None, {slot: value}) *state* pickle and copy
+        hand us, since they can't go through __setattr__
+        """
+        for (name, value) in state[1].items():
+            object.__setattr__(self, name, value)
+
+    # -------------------------------------------------------------------------
+    def __hash__(self):
+        """
+        [class td]
+
+        Hash on the duration. A td equals the int (or float) number of
+        seconds it holds, and it hashes the same way too. It also equals the
+        timedelta of that length, but an int and a timedelta hash
+        differently, so the hash can only agree with one of them. It agrees
+        with the int.
+        """
+        return hash(self._duration)
+
+    # -------------------------------------------------------------------------
+    def __add__(self, other):
+        """
+        [class td]
+
+        <td> + [<td>, <timedelta>, <int>] => <td>
+        <td> + [<dt>, <datetime>] => <dt>
+        """
+        if isinstance(other, (int, float)):
+            return td.from_seconds(self._duration + int(other))
+        elif isinstance(other, timedelta):
+            return td.from_seconds(int(self._duration +
+                                       other.total_seconds()))
+        elif isinstance(other, td):
+            return td.from_seconds(self._duration + other._duration)
+        elif isinstance(other, datetime):
+            return dt.from_epoch(int(other.timestamp() + self._duration))
+        elif isinstance(other, dt):
+            return dt.from_epoch(other._utc + self._duration, other._tz)
+        else:
+            return NotImplemented
+
+    # -------------------------------------------------------------------------
+    def __radd__(self, other):
+        """
+        [class td]
+
+        Handle <other> + <td>
+        """
+        return self.__add__(other)
+
+    # -------------------------------------------------------------------------
+    def __sub__(self, other):
+        """
+        [class td]
+
+        Handle <td> - [other]
+        """
+        if isinstance(other, td):
+            return td.from_seconds(self._duration - other._duration)
+        elif isinstance(other, timedelta):
+            return td.from_seconds(int(self._duration -
+                                       other.total_seconds()))
+        elif isinstance(other, (int, float)):
+            return td.from_seconds(self._duration - int(other))
+        else:
+            return NotImplemented
+
+    # -------------------------------------------------------------------------
+    def __rsub__(self, other):
+        """
+        [class td]
+
+        Handle [other] - <td>
+        """
+        if isinstance(other, timedelta):
+            return td.from_seconds(int(other.total_seconds() -
+                                       self._duration))
+        elif isinstance(other, (int, float)):
+            return td.from_seconds(int(other) - self._duration)
+        elif isinstance(other, datetime):
+            return dt.from_epoch(int(other.timestamp() - self._duration))
+        else:
+            return NotImplemented                            # pragma: no cover
+
+    # -------------------------------------------------------------------------
+    def __mul__(self, other):
+        """
+        [class td]
+
+        If *other* is a float or int, return td(self._duration * other)
+        """
+        if isinstance(other, (int, float)):
+            return td.from_seconds(round(other * self._duration))
+        else:
+            return NotImplemented
+
+    # -------------------------------------------------------------------------
+    def __rmul__(self, other):
+        """
+        [class td]
+
+        Handle reflected multiplications, a la, *other* * *self*
+        """
+        return self.__mul__(other)
+
+    # -------------------------------------------------------------------------
+    def __floordiv__(self, other):
+        """
+        [class td]
+
+        Handle td // (int or float)
+        """
+        if isinstance(other, (int, float)):
+            return td.from_seconds(int(self._duration // other))
+        else:
+            return NotImplemented
+
+    # -------------------------------------------------------------------------
+    def __truediv__(self, other):
+        """
+        [class td]
+
+        Handle td / (int or float)
+        """
+        if isinstance(other, (int, float)):
+            return td.from_seconds(round(self._duration / other))
+        else:
+            return NotImplemented
+
+    # -------------------------------------------------------------------------
+    def __mod__(self, other):
+        """
+        [class td]
+
+        Handle td % (int or float)
+        """
+        if isinstance(other, (int, float)):
+            return td.from_seconds(round(self._duration % other))
+        else:
+            return NotImplemented
+
+    # -------------------------------------------------------------------------
+    def __divmod__(self, other):
+        """
+        [class td]
+
+        Handle td.divmod(int or float)
+        """
+        if isinstance(other, (int, float)):
+            (q, r) = divmod(self._duration, other)
+            return (round(q), 1 if 0 < r < 1 else round(r))
+        else:
+            return NotImplemented
+
+    # -------------------------------------------------------------------------
+    def __eq__(self, other):
+        """
+        [class td]
+
+        True if *self*._duration == *other*._duration, otherwise False.
+        """
+        if isinstance(other, timedelta):
+            return self._duration == other.total_seconds()
+        elif isinstance(other, td):
+            return self._duration == other._duration
+        elif isinstance(other, (int, float)):
+            return self._duration == other
+        else:
+            raise TypeError(badop_msg('==/!=', '<td>', type(other)))
+
+    # -------------------------------------------------------------------------
+    def __ge__(self, other):
+        """
+        [class td]
+
+        True if *self*._duration > *other*._duration (or equivalent), otherwise
+        False.
+        """
+        if isinstance(other, td):
+            return self._duration >= other._duration
+        elif isinstance(other, timedelta):
+            return self._duration >= other.total_seconds()
+        elif isinstance(other, (int, float)):
+            return self._duration >= other
+        else:
+            raise TypeError(badop_msg('>=', '<td>', type(other)))
+
+    # -------------------------------------------------------------------------
+    def __gt__(self, other):
+        """
+        [class td]
+
+        True if *self*._duration > *other*._duration (or equivalent), otherwise
+        False.
+        """
+        if isinstance(other, td):
+            return self._duration > other._duration
+        elif isinstance(other, timedelta):
+            return self._duration > other.total_seconds()
+        elif isinstance(other, (int, float)):
+            return self._duration > other
+        else:
+            raise TypeError(badop_msg('>', '<td>', type(other)))
+
+    # -------------------------------------------------------------------------
+    def __le__(self, other):
+        """
+        [class td]
+
+        True if *self*._duration <= *other*._duration (or equivalent),
+        otherwise False.
+        """
+        if isinstance(other, td):
+            return self._duration <= other._duration
+        elif isinstance(other, timedelta):
+            return self._duration <= other.total_seconds()
+        elif isinstance(other, (int, float)):
+            return self._duration <= other
+        else:
+            raise TypeError(badop_msg('<=', '<td>', type(other)))
+
+    # -------------------------------------------------------------------------
+    def __lt__(self, other):
+        """
+        [class td]
+
+        True if *self*._duration < *other*._duration (or equivalent),
+        otherwise False.
+        """
+        if isinstance(other, td):
+            return self._duration < other._duration
+        elif isinstance(other, timedelta):
+            return self._duration < other.total_seconds()
+        elif isinstance(other, (int, float)):
+            return self._duration < other
+        else:
+            raise TypeError(badop_msg('<', '<td>', type(other)))
+
+    # -------------------------------------------------------------------------
+    def __repr__(self):
+        """
+        [class td]
+
+        Show the representation of *self*.
+        """
+        return "<dtm.td({})>".format(self._duration)
+
+    # -------------------------------------------------------------------------
+    def __str__(self):
+        """
+        [class td]
+
+        Show the str-formatted value of *self*.
+        """
+        r = self._duration
+        v = []
+        for div in [24*3600, 3600, 60, 1]:
+            (quo, r) = divmod(r, div)
+            v.append(quo)
+        return "{}d{:02d}:{:02d}:{:02d}".format(*tuple(v))
+
+    # -------------------------------------------------------------------------
+    def _secs(self):
+        """
+        [class td]
+
+        Dump the raw seconds for the object
+        """
+        return self._duration                                # pragma: no cover
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _fail(msg):
+        """
+        [class td]
+
+        Raise dt_error with *msg*
+        """
+        raise dt_error(msg)
+
+    # -------------------------------------------------------------------------
+    def days(self):
+        """
+        [class td]
+
+        Return the fractional number of days self represents
+        """
+        return self._duration / (24*3600)
+
+    # -------------------------------------------------------------------------
+    def hours(self):
+        """
+        [class td]
+
+        Return the fractional number of hours self represents
+        """
+        return self._duration / 3600
+
+    # -------------------------------------------------------------------------
+    def minutes(self):
+        """
+        [class td]
+
+        Return the fractional number of minutes self represents
+        """
+        return self._duration / 60
+
+    # -------------------------------------------------------------------------
+    def seconds(self):
+        """
+        [class td]
+
+        Return the number of seconds self represents
+        """
+        return self._duration
+
+    # -------------------------------------------------------------------------
+    def dhhmmss(self):
+        """
+        [class td]
+
+        Format self._duration for human legibility
+        """
+        pfx = '-' if self._duration < 0 else ''
+        secs = abs(self._duration)
+        vals = []
+        for div in [24 * 60 * 60, 60 * 60, 60, 1]:
+            (quo, secs) = divmod(secs, div)
+            vals.append(quo)
+        return "{}{}d{:02d}:{:02d}:{:02d}".format(pfx, *tuple(vals))
+
+    # -------------------------------------------------------------------------
+    def dhms(self):
+        """
+        [class td]
+
+        Break self._duration down into a tuple of (days, hours, minutes,
+        seconds)
+        """
+        mult = signum(self._duration)
+        secs = abs(self._duration)
+        vals = []
+        for div in [24*60*60, 60*60, 60, 1]:
+            (quo, secs) = divmod(secs, div)
+            vals.append(quo)
+        return tuple([mult*_ for _ in vals])
+
+
+# -----------------------------------------------------------------------------
+class DateRange(object):
+    """
+    The dt objects from *start* to *stop*, inclusive, *step* apart. An int
+    *step* counts calendar days: each element has the local time of *start*
+    (in start's zone), so the elements stay on the same time of day across
+    DST changes. A td *step* is an exact number of seconds (td(hours=1),
+    td(minutes=15), ...). A negative step runs backward, from a later
+    *start* to an earlier *stop*. The first element is always *start*
+    itself, even when its local time falls in a repeated fall hour.
+
+    Nothing is built up front. len(), indexing, slicing, membership and
+    reversed() are all arithmetic on the element number, so a range of
+    decades costs no more than a range of days.
+    """
+
+    __slots__ = ('_zone', '_base', '_unit', '_count', '_wall', '_anchor')
+
+    # -------------------------------------------------------------------------
+    def __init__(self, start, stop, step=1):
+        """
+        [class DateRange]
+
+        Set up the range from dt *start* to dt *stop* in increments of
+        *step*, which can be a non-zero int (days) or td
+        """
+        if isinstance(step, td):
+            wall, unit = False, step._duration
+        elif isinstance(step, int) and not isinstance(step, bool):
+            wall, unit = True, 86400 * step
+        else:
+            dt._fail("DateRange step must be an int (days) or a td")
+        if unit == 0:
+            dt._fail("DateRange step must not be zero")
+        zone = start._tz
+        base = _wall_seconds(zone, start._utc) if wall else start._utc
+        self._setup(zone, base, unit, 0, wall, (base, start._utc))
+        if 0 <= (stop._utc - start._utc) * unit:
+            self._count = self._fit(stop)
+
+    # -------------------------------------------------------------------------
+    def _setup(self, zone, base, unit, count, wall, anchor):
+        """
+        [class DateRange]
+
+        Fill in the members: element k is at *base* + k * *unit*, read as
+        local wall clock seconds in *zone* if *wall* is True or as a UTC
+        epoch otherwise, for k in range(*count*). *anchor* is the (wall,
+        epoch) pair of the range's start, which stays at its own epoch even
+        when its wall clock time is repeated.
+        """
+        self._zone = zone
+        self._base = base
+        self._unit = unit
+        self._count = count
+        self._wall = wall
+        self._anchor = anchor
+
+    # -------------------------------------------------------------------------
+    def _fit(self, stop):
+        """
+        [class DateRange]
+
+        Return the number of elements from the base up to and including
+        *stop*, given that the first one is not past it. The arithmetic
+        guess is only off when an element near *stop* has been moved by
+        DST, so it's settled by looking at a neighbor or two.
+        """
+        sign = 1 if 0 < self._unit else -1
+        if self._wall:
+            edge = _wall_seconds(self._zone, stop._utc)
+        else:
+            edge = stop._utc
+        last = (edge - self._base) // self._unit
+        while 0 < last and 0 < sign * (self._epoch(last) - stop._utc):
+            last -= 1
+        while sign * (self._epoch(last + 1) - stop._utc) <= 0:
+            last += 1
+        return last + 1
+
+    # -------------------------------------------------------------------------
+    def _epoch(self, idx):
+        """
+        [class DateRange]
+
+        Return the UTC epoch of element *idx*, whether it's in range or not
+        """
+        when = self._base + idx * self._unit
+        if not self._wall:
+            return when
+        if when == self._anchor[0]:
+            return self._anchor[1]
+        return _wall_epoch(self._zone, when)
+
+    # -------------------------------------------------------------------------
+    @property
+    def start(self):
+        """
+        [class DateRange]
+
+        The first element (where the range would start, if it's empty)
+        """
+        return dt.from_epoch(self._epoch(0), self._zone)
+
+    # -------------------------------------------------------------------------
+    @property
+    def stop(self):
+        """
+        [class DateRange]
+
+        The last element (the one before start, if the range is empty)
+        """
+        return dt.from_epoch(self._epoch(self._count - 1), self._zone)
+
+    # -------------------------------------------------------------------------
+    @property
+    def step(self):
+        """
+        [class DateRange]
+
+        The step: an int number of days or a td
+        """
+        if self._wall:
+            return self._unit // 86400
+        return td.from_seconds(self._unit)
+
+    # -------------------------------------------------------------------------
+    def epochs(self):
+        """
+        [class DateRange]
+
+        Return the UTC epochs of all the elements as an int64 array (see
+        int64_array()). No dt objects are made. With numpy and a pytz zone,
+        the whole range is a few array operations.
+        """
+        if numpy:
+            walls = self._base + self._unit * numpy.arange(self._count,
+                                                           dtype=numpy.int64)
+        else:
+            walls = array('q', range(self._base,
+                                     self._base + self._count * self._unit,
+                                     self._unit))
+        if not self._wall:
+            return walls if numpy else int64_array(walls)
+        table = ZoneTable.get(self._zone)
+        if table is None:
+            return int64_array(self._epoch(_) for _ in range(self._count))
+        if numpy:
+            rval = walls - table.wall_offset_many(walls)
+            rval[walls == self._anchor[0]] = self._anchor[1]
+            return rval
+        return int64_array(self._anchor[1] if w == self._anchor[0] else w - o
+                           for w, o in
+                           zip(walls, table.wall_offset_many(walls)))
+
+    # -------------------------------------------------------------------------
+    def __len__(self):
+        """
+        [class DateRange]
+
+        The number of elements in the range
+        """
+        return self._count
+
+    # -------------------------------------------------------------------------
+    def __getitem__(self, idx):
+        """
+        [class DateRange]
+
+        Return element *idx* as a dt. A slice gives another DateRange.
+        """
+        if isinstance(idx, slice):
+            picks = range(*idx.indices(self._count))
+            rval = object.__new__(DateRange)
+            rval._setup(self._zone, self._base + picks.start * self._unit,
+                        self._unit * picks.step, len(picks), self._wall,
+                        self._anchor)
+            return rval
+        if idx < 0:
+            idx += self._count
+        if not 0 <= idx < self._count:
+            raise IndexError("DateRange index out of range")
+        return dt.from_epoch(self._epoch(idx), self._zone)
+
+    # -------------------------------------------------------------------------
+    def __iter__(self):
+        """
+        [class DateRange]
+
+        Yield each element in order, computing them as we go
+        """
+        for idx in range(self._count):
+            yield dt.from_epoch(self._epoch(idx), self._zone)
+
+    # -------------------------------------------------------------------------
+    def __reversed__(self):
+        """
+        [class DateRange]
+
+        Yield each element, last to first
+        """
+        for idx in range(self._count - 1, -1, -1):
+            yield dt.from_epoch(self._epoch(idx), self._zone)
+
+    # -------------------------------------------------------------------------
+    def __contains__(self, item):
+        """
+        [class DateRange]
+
+        True if dt *item* is one of the elements. The candidate element
+        number comes straight from the arithmetic.
+        """
+        if not isinstance(item, dt):
+            return False
+        if self._wall:
+            when = _wall_seconds(self._zone, item._utc)
+            idx = round((when - self._base) / self._unit)
+        else:
+            idx, rem = divmod(item._utc - self._base, self._unit)
+            if rem:
+                return False
+        return 0 <= idx < self._count and self._epoch(idx) == item._utc
+
+    # -------------------------------------------------------------------------
+    def __repr__(self):
+        """
+        [class DateRange]
+
+        Show the first and last elements and the step
+        """
+        return "DateRange({!r}, {!r}, {!r})".format(self.start, self.stop,
+                                                    self.step)
+
+
+# -----------------------------------------------------------------------------
+class DtArray(object):
+    """
+    Many moments in one timezone, stored as an int64 array of UTC epochs (see
+    int64_array()) and a single tzinfo rather than as a list of dt objects,
+    so each moment costs eight bytes. Elements come out as dt objects when
+    they're asked for one at a time. The bulk methods (strftime, weekday,
+    next_day, comparisons, + and - with a td or TdArray) work on the whole
+    array at once.
+    """
+
+    __slots__ = ('_epochs', '_tz')
+
+    # -------------------------------------------------------------------------
+    def __init__(self, epochs=(), tz=None):
+        """
+        [class DtArray]
+
+        Hold UTC *epochs* (any iterable of ints, ideally an int64 array) in
+        zone *tz*, which can be None (local), a name, or a tzinfo
+        """
+        self._epochs = _int64_column(epochs)
+        self._tz = dt._static_brew_tz(tz)
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def from_dts(cls, dts, tz=None):
+        """
+        [class DtArray]
+
+        Build a DtArray from a sequence of dt objects. The zone is *tz* if
+        it's given, otherwise that of the first dt (or local, if there
+        isn't one).
+        """
+        dts = list(dts)
+        if tz is None and dts:
+            tz = dts[0]._tz
+        return cls(int64_array(_._utc for _ in dts), tz)
+
+    # -------------------------------------------------------------------------
+    def _wrap(self, epochs):
+        """
+        [class DtArray]
+
+        Return a DtArray in our zone around int64 array *epochs* as is
+        """
+        rval = object.__new__(DtArray)
+        rval._epochs = epochs
+        rval._tz = self._tz
+        return rval
+
+    # -------------------------------------------------------------------------
+    def epochs(self):
+        """
+        [class DtArray]
+
+        Return the underlying int64 array of UTC epochs
+        """
+        return self._epochs
+
+    # -------------------------------------------------------------------------
+    def __len__(self):
+        """
+        [class DtArray]
+
+        The number of moments
+        """
+        return len(self._epochs)
+
+    # -------------------------------------------------------------------------
+    def __getitem__(self, idx):
+        """
+        [class DtArray]
+
+        Return element *idx* as a dt. A slice (or, with numpy, an index or
+        mask array) gives another DtArray.
+        """
+        if isinstance(idx, slice) or hasattr(idx, '__len__'):
+            return self._wrap(self._epochs[idx])
+        return dt.from_epoch(int(self._epochs[idx]), self._tz)
+
+    # -------------------------------------------------------------------------
+    def __iter__(self):
+        """
+        [class DtArray]
+
+        Yield each element as a dt
+        """
+        zone = self._tz
+        for epoch in self._epochs:
+            yield dt.from_epoch(int(epoch), zone)
+
+    # -------------------------------------------------------------------------
+    def __repr__(self):
+        """
+        [class DtArray]
+
+        Show the first few epochs and the zone
+        """
+        epochs = ", ".join(str(_) for _ in self._epochs[:6])
+        if 6 < len(self._epochs):
+            epochs += ", ..."
+        return "DtArray([{}], tz='{}')".format(epochs,
+                                               TzEngine.zone_name(self._tz))
+
+    # -------------------------------------------------------------------------
+    def strftime(self, fmt, tz=None):
+        """
+        [class DtArray]
+
+        Return a list of each moment formatted according to *fmt* as a local
+        time in zone *tz* (default: ours). See format_many().
+        """
+        return format_many(self._epochs, fmt, self._tz if tz is None else tz)
+
+    # -------------------------------------------------------------------------
+    def weekday(self, tz=None):
+        """
+        [class DtArray]
+
+        Return a list of the lowercase abbreviated weekday names of the
+        moments in zone *tz* (default: ours)
+        """
+        wkdl = dt.weekday_list()
+        walls = localize_many(self._epochs, self._tz if tz is None else tz)
+        if numpy:
+            return [wkdl[_] for _ in (walls // 86400 + 3) % 7]
+        return [wkdl[(_ // 86400 + 3) % 7] for _ in walls]
+
+    # -------------------------------------------------------------------------
+    def next_day(self, count=1):
+        """
+        [class DtArray]
+
+        Return a DtArray of the moments *count* calendar days later, at the
+        same local time, as dt.next_day() would for each
+        """
+        return self._wrap(self._shift_days(count))
+
+    # -------------------------------------------------------------------------
+    def previous_day(self, count=1):
+        """
+        [class DtArray]
+
+        Return a DtArray of the moments *count* calendar days earlier, at
+        the same local time, as dt.previous_day() would for each
+        """
+        return self._wrap(self._shift_days(-count))
+
+    # -------------------------------------------------------------------------
+    def _shift_days(self, count):
+        """
+        [class DtArray]
+
+        Move every moment *count* days on the local wall clock and localize
+        them again (see dt._shift_days()), returning the new epochs
+        """
+        walls = localize_many(self._epochs, self._tz)
+        shift = 86400 * count
+        table = ZoneTable.get(self._tz)
+        if numpy and table is not None:
+            walls = walls + shift
+            return walls - table.wall_offset_many(walls)
+        return int64_array(_wall_epoch(self._tz, int(_) + shift)
+                           for _ in walls)
+
+    # -------------------------------------------------------------------------
+    def __add__(self, other):
+        """
+        [class DtArray]
+
+        <DtArray> + [<td>, <timedelta>, <int>, <float>, <TdArray>] =>
+        <DtArray>
+        """
+        secs = _span_seconds(other, len(self))
+        if secs is None:
+            return NotImplemented
+        return self._wrap(_column_op(add, self._epochs, secs))
+
+    # -------------------------------------------------------------------------
+    def __radd__(self, other):
+        """
+        [class DtArray]
+
+        Handle <other> + <DtArray>
+        """
+        return self.__add__(other)
+
+    # -------------------------------------------------------------------------
+    def __sub__(self, other):
+        """
+        [class DtArray]
+
+        <DtArray> - [<td>, <timedelta>, <int>, <float>, <TdArray>] =>
+        <DtArray>
+        <DtArray> - [<dt>, <datetime>, <DtArray>] => <TdArray>
+        """
+        if isinstance(other, dt):
+            right = other._utc
+        elif isinstance(other, datetime):
+            right = int(other.timestamp())
+        elif isinstance(other, DtArray):
+            if len(other) != len(self):
+                dt._fail("DtArray lengths differ")
+            right = other._epochs
+        else:
+            secs = _span_seconds(other, len(self))
+            if secs is None:
+                return NotImplemented
+            return self._wrap(_column_op(sub, self._epochs, secs))
+        return TdArray._wrap(_column_op(sub, self._epochs, right))
+
+    # -------------------------------------------------------------------------
+    def _compare(self, other, opname, func):
+        """
+        [class DtArray]
+
+        Compare each moment with *other* (a dt, a datetime, or a DtArray of
+        the same length) using *func*. The result is a numpy bool array if
+        numpy is available, otherwise a list of bools.
+        """
+        if isinstance(other, dt):
+            right = other._utc
+        elif isinstance(other, datetime):
+            right = int(other.timestamp())
+        elif isinstance(other, DtArray):
+            if len(other) != len(self):
+                dt._fail("DtArray lengths differ")
+            right = other._epochs
+        else:
+            raise TypeError(badop_msg(opname, '<DtArray>', type(other)))
+        return _elementwise(func, self._epochs, right)
+
+    # -------------------------------------------------------------------------
+    def __eq__(self, other):
+        """
+        [class DtArray]
+
+        Elementwise ==
+        """
+        return self._compare(other, '==', eq)
+
+    # -------------------------------------------------------------------------
+    def __ne__(self, other):
+        """
+        [class DtArray]
+
+        Elementwise !=
+        """
+        return self._compare(other, '!=', ne)
+
+    # -------------------------------------------------------------------------
+    def __lt__(self, other):
+        """
+        [class DtArray]
+
+        Elementwise <
+        """
+        return self._compare(other, '<', lt)
+
+    # -------------------------------------------------------------------------
+    def __le__(self, other):
+        """
+        [class DtArray]
+
+        Elementwise <=
+        """
+        return self._compare(other, '<=', le)
+
+    # -------------------------------------------------------------------------
+    def __gt__(self, other):
+        """
+        [class DtArray]
+
+        Elementwise >
+        """
+        return self._compare(other, '>', gt)
+
+    # -------------------------------------------------------------------------
+    def __ge__(self, other):
+        """
+        [class DtArray]
+
+        Elementwise >=
+        """
+        return self._compare(other, '>=', ge)
+
+
+# -----------------------------------------------------------------------------
+class TdArray(object):
+    """
+    Many durations, stored as an int64 array of seconds (see int64_array())
+    rather than as a list of td objects. Elements come out as td objects
+    when they're asked for one at a time. Arithmetic, comparisons, rendering
+    (dhhmmss, dhms) and reductions (sum, min, max, mean) work on the whole
+    array at once.
+    """
+
+    __slots__ = ('_durations',)
+
+    # -------------------------------------------------------------------------
+    def __init__(self, durations=()):
+        """
+        [class TdArray]
+
+        Hold *durations*, any iterable of ints (seconds), ideally an int64
+        array
+        """
+        self._durations = _int64_column(durations)
+
+    # -------------------------------------------------------------------------
+    @classmethod
+    def from_tds(cls, tds):
+        """
+        [class TdArray]
+
+        Build a TdArray from a sequence of td objects
+        """
+        return cls(int64_array(_._duration for _ in tds))
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _wrap(durations):
+        """
+        [class TdArray]
+
+        Return a TdArray around int64 array *durations* as is
+        """
+        rval = object.__new__(TdArray)
+        rval._durations = durations
+        return rval
+
+    # -------------------------------------------------------------------------
+    def seconds(self):
+        """
+        [class TdArray]
+
+        Return the underlying int64 array of seconds
+        """
+        return self._durations
+
+    # -------------------------------------------------------------------------
+    def __len__(self):
+        """
+        [class TdArray]
+
+        The number of durations
+        """
+        return len(self._durations)
 
-# -----------------------------------------------------------------------------
-def count_in(dct, seq):
-    """
-    Count the number of items in *seq* that are in *dct*. This is used to
-    decide whether multiple forms of keyword arguments are used in the td
-    constructor. For example, the user should not provide both 's' and 'secs'.
-    """
-    return sum([1 for _ in seq if _ in dct])
+    # -------------------------------------------------------------------------
+    def __getitem__(self, idx):
+        """
+        [class TdArray]
 
+        Return element *idx* as a td. A slice (or, with numpy, an index or
+        mask array) gives another TdArray.
+        """
+        if isinstance(idx, slice) or hasattr(idx, '__len__'):
+            return TdArray._wrap(self._durations[idx])
+        return td.from_seconds(int(self._durations[idx]))
 
-# -----------------------------------------------------------------------------
-class td(object):
-    """
-    This object represents a period of time, stored as a number of seconds.
-    """
     # -------------------------------------------------------------------------
-    def __init__(self, *args, **kw):
+    def __iter__(self):
         """
-        [class td]
+        [class TdArray]
 
-        Argument formats:
-            ([[[days,] hours,] minutes,] seconds)
-            {'s': <int>,         # seconds
-             'secs': <int>,
-             'seconds': <int>,
-             'm': <int>,         # minutes
-             'mins': <int>,
-             'minutes': <int>,
-             'h': <int>,         # hours
-             'hrs': <int>,
-             'hours': <int>,
-             'd': <int>,         # days
-             'days': <int>,
-            }
+        Yield each element as a td
         """
-        sunits = ['s', 'secs', 'seconds']
-        munits = ['m', 'mins', 'minutes']
-        hunits = ['h', 'hrs', 'hours']
-        dunits = ['d', 'days']
-        if len(args) == 0:
-            if 1 < count_in(kw, sunits):
-                self._fail("Mutually exclusive arguments: s, secs, seconds")
-            elif 1 < count_in(kw, ['m', 'mins', 'minutes']):
-                self._fail("Mutually exclusive arguments: m, mins, minutes")
-            elif 1 < count_in(kw, ['h', 'hrs', 'hours']):
-                self._fail("Mutually exclusive arguments: h, hrs, hours")
-            elif 1 < count_in(kw, ['d', 'days']):
-                self._fail("Mutually exclusive arguments: d, days")
+        for secs in self._durations:
+            yield td.from_seconds(int(secs))
 
-            secs = kw.get('s') or kw.get('secs') or kw.get('seconds') or 0
-            mins = kw.get('m') or kw.get('mins') or kw.get('minutes') or 0
-            hours = kw.get('h') or kw.get('hrs') or kw.get('hours') or 0
-            days = kw.get('d') or kw.get('days') or 0
+    # -------------------------------------------------------------------------
+    def __repr__(self):
+        """
+        [class TdArray]
 
-            duration = secs + 60 * (mins + (60 * (hours + 24 * days)))
-        elif any([_ in kw for _ in sunits + munits + hunits + dunits]):
-            self._fail("Expected either *args or *kw, not both")
-        elif isinstance(args[0], timedelta):
-            duration = args[0].total_seconds()
-        else:
-            largs = list(args)
-            mult = [24*3600, 3600, 60]
-            duration = largs.pop()
-            while largs:
-                duration = duration + mult.pop() * largs.pop()
-        self._duration = int(duration)
+        Show the first few durations
+        """
+        durations = ", ".join(str(_) for _ in self._durations[:6])
+        if 6 < len(self._durations):
+            durations += ", ..."
+        return "TdArray([{}])".format(durations)
 
     # -------------------------------------------------------------------------
     def __add__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        <td> + [<td>, <timedelta>, <int>] => <td>
-        <td> + [<dt>, <datetime>] => <dt>
+        <TdArray> + [<td>, <timedelta>, <int>, <float>, <TdArray>] =>
+        <TdArray>
         """
-        if isinstance(other, (int, float)):
-            return td(self._duration + int(other))
-        elif isinstance(other, timedelta):
-            return td(self._duration + other.total_seconds())
-        elif isinstance(other, td):
-            return td(self._duration + other._duration)
-        elif isinstance(other, datetime):
-            return dt(epoch=other.timestamp() + self._duration)
-        elif isinstance(other, dt):
-            return dt(epoch=other._utc + self._duration)
-        else:
+        secs = _span_seconds(other, len(self))
+        if secs is None:
             return NotImplemented
+        return TdArray._wrap(_column_op(add, self._durations, secs))
 
     # -------------------------------------------------------------------------
     def __radd__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        Handle <other> + <td>
+        Handle <other> + <TdArray>
         """
         return self.__add__(other)
 
     # -------------------------------------------------------------------------
     def __sub__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        Handle <td> - [other]
+        <TdArray> - [<td>, <timedelta>, <int>, <float>, <TdArray>] =>
+        <TdArray>
         """
-        if isinstance(other, td):
-            return td(self._duration - other._duration)
-        elif isinstance(other, timedelta):
-            return td(self._duration - other.total_seconds())
-        elif isinstance(other, (int, float)):
-            return td(self._duration - int(other))
-        else:
+        secs = _span_seconds(other, len(self))
+        if secs is None:
             return NotImplemented
+        return TdArray._wrap(_column_op(sub, self._durations, secs))
 
     # -------------------------------------------------------------------------
     def __rsub__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        Handle [other] - <td>
+        Handle [<td>, <timedelta>, <int>, <float>] - <TdArray>
         """
-        if isinstance(other, timedelta):
-            return td(other.total_seconds() - self._duration)
-        elif isinstance(other, (int, float)):
-            return td(int(other) - self._duration)
-        elif isinstance(other, datetime):
-            return dt(epoch=other.timestamp() - self._duration)
-        else:
-            return NotImplemented                            # pragma: no cover
+        secs = _span_seconds(other, len(self))
+        if secs is None:
+            return NotImplemented
+        return TdArray._wrap(_column_op(lambda a, b: b - a,
+                                        self._durations, secs))
 
     # -------------------------------------------------------------------------
-    def __mul__(self, other):
+    def _scaled(self, func, other):
         """
-        [class td]
+        [class TdArray]
 
-        If *other* is a float or int, return td(self._duration * other)
+        Return a TdArray of func(duration, *other*) for each duration, with
+        *other* an int or float. Fractional results are rounded to whole
+        seconds, as td does.
+        """
+        if numpy:
+            rval = func(self._durations, other)
+            if rval.dtype.kind == 'f':
+                rval = numpy.rint(rval).astype(numpy.int64)
+            return TdArray._wrap(rval)
+        return TdArray._wrap(int64_array(round(func(_, other))
+                                         for _ in self._durations))
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _divisor(other):
+        """
+        [class TdArray]
+
+        Return *other* (a number or an int64 array of seconds) if it's safe
+        to divide by. numpy would only warn about a zero and hand back junk,
+        so we raise ZeroDivisionError for it, as td and array('q') do.
         """
         if isinstance(other, (int, float)):
-            return td(round(other * self._duration))
+            zero = other == 0
+        elif numpy:
+            zero = not other.all()
         else:
-            return NotImplemented
+            zero = 0 in other
+        if zero:
+            raise ZeroDivisionError("TdArray division or modulo by zero")
+        return other
 
     # -------------------------------------------------------------------------
-    def __rmul__(self, other):
+    def __mul__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        Handle reflected multiplications, a la, *other* * *self*
+        <TdArray> * [<int>, <float>] => <TdArray>
         """
-        return self.__mul__(other)
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        return self._scaled(mul, other)
 
     # -------------------------------------------------------------------------
-    def __floordiv__(self, other):
+    def __rmul__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        Handle td // (int or float)
+        Handle <other> * <TdArray>
         """
-        if isinstance(other, (int, float)):
-            return td(int(self._duration // other))
-        else:
-            return NotImplemented
+        return self.__mul__(other)
 
     # -------------------------------------------------------------------------
     def __truediv__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        Handle td / (int or float)
+        <TdArray> / [<int>, <float>] => <TdArray>
         """
-        if isinstance(other, (int, float)):
-            return td(round(self._duration / other))
-        else:
+        if not isinstance(other, (int, float)):
             return NotImplemented
+        return self._scaled(truediv, self._divisor(other))
 
     # -------------------------------------------------------------------------
-    def __mod__(self, other):
+    def __floordiv__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        Handle td % (int or float)
+        <TdArray> // [<int>, <float>] => <TdArray>
+        <TdArray> // [<td>, <timedelta>, <TdArray>] => int64 array of counts
         """
         if isinstance(other, (int, float)):
-            return td(round(self._duration % other))
-        else:
+            return self._scaled(floordiv, self._divisor(other))
+        secs = _span_seconds(other, len(self))
+        if secs is None:
             return NotImplemented
+        return _column_op(floordiv, self._durations, self._divisor(secs))
 
     # -------------------------------------------------------------------------
-    def __divmod__(self, other):
+    def __mod__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        Handle td.divmod(int or float)
+        <TdArray> % [<int>, <float>, <td>, <timedelta>, <TdArray>] =>
+        <TdArray>
         """
         if isinstance(other, (int, float)):
-            (q, r) = divmod(self._duration, other)
-            return (round(q), 1 if 0 < r < 1 else round(r))
-        else:
+            return self._scaled(mod, self._divisor(other))
+        secs = _span_seconds(other, len(self))
+        if secs is None:
             return NotImplemented
+        return TdArray._wrap(_column_op(mod, self._durations,
+                                        self._divisor(secs)))
 
     # -------------------------------------------------------------------------
-    def __eq__(self, other):
+    def __divmod__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        True if *self*._duration == *other*._duration, otherwise False.
+        Return (self // other, self % other)
         """
-        if isinstance(other, timedelta):
-            return self._duration == other.total_seconds()
-        elif isinstance(other, td):
-            return self._duration == other._duration
-        elif isinstance(other, (int, float)):
-            return self._duration == other
-        else:
-            raise TypeError(badop_msg('==/!=', '<td>', type(other)))
+        quo = self.__floordiv__(other)
+        if quo is NotImplemented:
+            return quo
+        return (quo, self.__mod__(other))
 
     # -------------------------------------------------------------------------
-    def __ge__(self, other):
+    def _compare(self, other, opname, func):
         """
-        [class td]
+        [class TdArray]
 
-        True if *self*._duration > *other*._duration (or equivalent), otherwise
-        False.
+        Compare each duration with *other* (a td, a timedelta, a number of
+        seconds, or a TdArray of the same length) using *func*. The result
+        is a numpy bool array if numpy is available, otherwise a list of
+        bools.
         """
-        if isinstance(other, td):
-            return self._duration >= other._duration
-        elif isinstance(other, timedelta):
-            return self._duration >= other.total_seconds()
-        elif isinstance(other, (int, float)):
-            return self._duration >= other
+        if isinstance(other, float):
+            right = other
         else:
-            raise TypeError(badop_msg('>=', '<td>', type(other)))
+            right = _span_seconds(other, len(self))
+        if right is None:
+            raise TypeError(badop_msg(opname, '<TdArray>', type(other)))
+        return _elementwise(func, self._durations, right)
 
     # -------------------------------------------------------------------------
-    def __gt__(self, other):
+    def __eq__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        True if *self*._duration > *other*._duration (or equivalent), otherwise
-        False.
+        Elementwise ==
         """
-        if isinstance(other, td):
-            return self._duration > other._duration
-        elif isinstance(other, timedelta):
-            return self._duration > other.total_seconds()
-        elif isinstance(other, (int, float)):
-            return self._duration > other
-        else:
-            raise TypeError(badop_msg('>', '<td>', type(other)))
+        return self._compare(other, '==', eq)
 
     # -------------------------------------------------------------------------
-    def __le__(self, other):
+    def __ne__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        True if *self*._duration <= *other*._duration (or equivalent),
-        otherwise False.
+        Elementwise !=
         """
-        if isinstance(other, td):
-            return self._duration <= other._duration
-        elif isinstance(other, timedelta):
-            return self._duration <= other.total_seconds()
-        elif isinstance(other, (int, float)):
-            return self._duration <= other
-        else:
-            raise TypeError(badop_msg('<=', '<td>', type(other)))
+        return self._compare(other, '!=', ne)
 
     # -------------------------------------------------------------------------
     def __lt__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        True if *self*._duration < *other*._duration (or equivalent),
-        otherwise False.
+        Elementwise <
         """
-        if isinstance(other, td):
-            return self._duration < other._duration
-        elif isinstance(other, timedelta):
-            return self._duration < other.total_seconds()
-        elif isinstance(other, (int, float)):
-            return self._duration < other
-        else:
-            raise TypeError(badop_msg('<', '<td>', type(other)))
+        return self._compare(other, '<', lt)
 
     # -------------------------------------------------------------------------
-    def __repr__(self):
+    def __le__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        Show the representation of *self*.
+        Elementwise <=
         """
-        return "<dtm.td({})>".format(self._duration)
+        return self._compare(other, '<=', le)
 
     # -------------------------------------------------------------------------
-    def __str__(self):
+    def __gt__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        Show the str-formatted value of *self*.
+        Elementwise >
         """
-        r = self._duration
-        v = []
-        for div in [24*3600, 3600, 60, 1]:
-            (quo, r) = divmod(r, div)
-            v.append(quo)
-        return "{}d{:02d}:{:02d}:{:02d}".format(*tuple(v))
+        return self._compare(other, '>', gt)
 
     # -------------------------------------------------------------------------
-    def _secs(self):
+    def __ge__(self, other):
         """
-        [class td]
+        [class TdArray]
 
-        Dump the raw seconds for the object
+        Elementwise >=
         """
-        return self._duration                                # pragma: no cover
+        return self._compare(other, '>=', ge)
 
     # -------------------------------------------------------------------------
-    @staticmethod
-    def _fail(msg):
+    def _parts(self):
         """
-        [class td]
+        [class TdArray]
 
-        Raise dt_error with *msg*
+        Return a list of the sign of each duration, followed by lists of the
+        days, hours, minutes, and seconds of their magnitudes
         """
-        raise dt_error(msg)
+        if numpy:
+            mags = numpy.abs(self._durations)
+            signs = numpy.sign(self._durations).tolist()
+        else:
+            mags = [abs(_) for _ in self._durations]
+            signs = [signum(_) for _ in self._durations]
+        rval = [signs]
+        for div in [24 * 60 * 60, 60 * 60, 60]:
+            if numpy:
+                (quo, mags) = numpy.divmod(mags, div)
+                rval.append(quo.tolist())
+            else:
+                rval.append([_ // div for _ in mags])
+                mags = [_ % div for _ in mags]
+        rval.append(mags.tolist() if numpy else mags)
+        return rval
 
     # -------------------------------------------------------------------------
-    def days(self):
+    def dhhmmss(self):
         """
-        [class td]
+        [class TdArray]
 
-        Return the fractional number of days self represents
+        Return a list of each duration formatted as td.dhhmmss() would
         """
-        return self._duration / (24*3600)
+        return ["{}{}d{:02d}:{:02d}:{:02d}".format('-' if sign < 0 else '',
+                                                   days, hours, mins, secs)
+                for sign, days, hours, mins, secs in zip(*self._parts())]
 
     # -------------------------------------------------------------------------
-    def hours(self):
+    def dhms(self):
         """
-        [class td]
+        [class TdArray]
 
-        Return the fractional number of hours self represents
+        Return a list of (days, hours, minutes, seconds) tuples, as
+        td.dhms() would give for each duration
         """
-        return self._duration / 3600
+        return [(sign * days, sign * hours, sign * mins, sign * secs)
+                for sign, days, hours, mins, secs in zip(*self._parts())]
 
     # -------------------------------------------------------------------------
-    def minutes(self):
+    def sum(self):
         """
-        [class td]
+        [class TdArray]
 
-        Return the fractional number of minutes self represents
+        Return the total of the durations as a td
         """
-        return self._duration / 60
+        if numpy:
+            return td.from_seconds(int(self._durations.sum()))
+        return td.from_seconds(sum(self._durations))
 
     # -------------------------------------------------------------------------
-    def seconds(self):
+    def min(self):
         """
-        [class td]
+        [class TdArray]
 
-        Return the number of seconds self represents
+        Return the shortest duration as a td
         """
-        return self._duration
+        if not len(self):
+            td._fail("min() of an empty TdArray")
+        if numpy:
+            return td.from_seconds(int(self._durations.min()))
+        return td.from_seconds(min(self._durations))
 
     # -------------------------------------------------------------------------
-    def dhhmmss(self):
+    def max(self):
         """
-        [class td]
+        [class TdArray]
 
-        Format self._duration for human legibility
+        Return the longest duration as a td
         """
-        pfx = '-' if self._duration < 0 else ''
-        secs = abs(self._duration)
-        vals = []
-        for div in [24 * 60 * 60, 60 * 60, 60, 1]:
-            (quo, secs) = divmod(secs, div)
-            vals.append(quo)
-        return "{}{}d{:02d}:{:02d}:{:02d}".format(pfx, *tuple(vals))
+        if not len(self):
+            td._fail("max() of an empty TdArray")
+        if numpy:
+            return td.from_seconds(int(self._durations.max()))
+        return td.from_seconds(max(self._durations))
 
     # -------------------------------------------------------------------------
-    def dhms(self):
+    def mean(self):
         """
-        [class td]
+        [class TdArray]
 
-        Break self._duration down into a tuple of (days, hours, minutes,
-        seconds)
+        Return the average duration as a td, rounded to a whole second
         """
-        mult = signum(self._duration)
-        secs = abs(self._duration)
-        vals = []
-        for div in [24*60*60, 60*60, 60, 1]:
-            (quo, secs) = divmod(secs, div)
-            vals.append(quo)
-        return tuple([mult*_ for _ in vals])
+        if not len(self):
+            td._fail("mean() of an empty TdArray")
+        return td.from_seconds(round(self.sum()._duration / len(self)))
 
 
 """
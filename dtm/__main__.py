@@ -30,12 +30,15 @@ The following sequences provide valid human-readable displays of UTC:
 """
 from docopt_dispatch import dispatch
 from datetime import datetime
-from dtm import dt, td
-import pdb
-import pytz
-import random
+from dtm import dt, td, _LazyModule
 import time
 
+# Most commands need at most one of these, so don't pay for importing them
+# until they're used
+pdb = _LazyModule('pdb')
+pytz = _LazyModule('pytz')
+random = _LazyModule('random')
+
 
 # -----------------------------------------------------------------------------
 @dispatch.on('calendar')
@@ -1,5 +1,8 @@
+import contextlib
+import dtm
 import pytest
 import pytz
+import tbx
 import tzlocal
 
 
@@ -11,6 +14,21 @@ tz_esdt = pytz.timezone('est5edt')
 tz_local = tzlocal.get_localzone()
 
 
+# -----------------------------------------------------------------------------
+@contextlib.contextmanager
+def display_env(**kw):
+    """
+    Set (or, for None values, unset) environment variables like tbx.envset()
+    and have dtm reload its display formats on the way in and out
+    """
+    try:
+        with tbx.envset(**kw):
+            dtm.reload_display()
+            yield
+    finally:
+        dtm.reload_display()
+
+
 # -----------------------------------------------------------------------------
 def lrx_exc_test(op, left, right, exp):
     """
@@ -1,5 +1,6 @@
-from datetime import datetime
-from dtm import dt, dt_error
+from datetime import datetime, timedelta
+import dtm
+from dtm import dt, dt_error, FormatMatcher
 import dtm_test_utils as dtu
 import pytest
 import pytz
@@ -15,7 +16,7 @@ import tzlocal
     dtu.pp("2007/11/03 02:00", 'est5edt', 'cst6cdt', "2007-11-03 01:00:00 CDT",
            id="%Y/%m/%d %H:%M"),
     dtu.pp("2007-11-03T03:00:00Z", 'est5edt', 'cst6cdt',
-           "2007-11-03 02:00:00 CDT", id="%Y-%m-%dT%H:%M:%SZ"),
+           "2007-11-02 22:00:00 CDT", id="%Y-%m-%dT%H:%M:%SZ"),
     dtu.pp("2008-02-29T23:59:59", 'cst6cdt', 'est5edt',
            "2008-03-01 00:59:59 EST", id="%Y-%m-%dT%H:%M:%S"),
     dtu.pp("bad dtspec", None, None,
@@ -49,6 +50,92 @@ def test_from_format(dtspec, itz, otz, exp):
         assert actual("%F %T %Z", tz=otz) == exp
 
 
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("dtspec, itz, exp", [
+    dtu.pp("2019-10-17T17:00:00+00:00", 'est5edt', 1571331600, id="+00:00"),
+    dtu.pp("2019-10-17T22:30:00+05:30", 'est5edt', 1571331600, id="+05:30"),
+    dtu.pp("2019-10-17T09:00:00-0800", None, 1571331600, id="-0800"),
+    dtu.pp("2019-10-17T19:00+02", 'utc', 1571331600, id="+02, no seconds"),
+    dtu.pp("2019-10-17T17:00:00.999999+00:00", None, 1571331600,
+           id="fraction"),
+    dtu.pp("2019-10-17T17:00:00Z", 'est5edt', 1571331600, id="Z"),
+    dtu.pp("2019-10-17T17:00:00.5z", None, 1571331600, id="lowercase z"),
+    dtu.pp("2019-10-17t13:00:00", 'est5edt', 1571331600, id="no offset"),
+    dtu.pp("2019-02-29T00:00:00+00:00", None,
+           dt_error("None of the formats matched"), id="no such day"),
+    dtu.pp("2019-10-17T17:00:00+99:99", 'utc',
+           dt_error("None of the formats matched"), id="no such offset"),
+])
+def test_from_iso(dtspec, itz, exp):
+    """
+    ISO 8601 date-times with a UTC offset or Z should be read at that
+    offset whatever the zone. Without one, they're read in the zone.
+    """
+    pytest.dbgfunc()
+    if isinstance(exp, dt_error):
+        with pytest.raises(dt_error) as err:
+            dt(dtspec, tz=itz)
+        assert str(exp) in str(err.value)
+    else:
+        assert dt(dtspec, tz=itz)._utc == exp
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("fmts, spec, exp", [
+    dtu.pp(dt._pformats, "2019.1001", datetime(2019, 10, 1), id="%Y.%m%d"),
+    dtu.pp(dt._pformats, "2001/3/24 19:35", datetime(2001, 3, 24, 19, 35),
+           id="%Y/%m/%d %H:%M"),
+    dtu.pp(dt._pformats, "2007-11-03t03:00:00z", datetime(2007, 11, 3, 3),
+           id="ignore case"),
+    dtu.pp(dt._pformats, "12/11/25", datetime(2025, 12, 11), id="%m/%d/%y"),
+    dtu.pp(dt._pformats, "12/11/1969", datetime(1969, 12, 11),
+           id="%m/%d/%Y"),
+    dtu.pp(dt._pformats, "2019.0230", None, id="no such day"),
+    dtu.pp(dt._pformats, "2019.10 1", datetime(2019, 10, 1),
+           id="space padded day"),
+    dtu.pp(["%d/%m/%y", "%m/%d/%y"], "12/11/25", datetime(2025, 11, 12),
+           id="precedence"),
+    dtu.pp(["%d/%m/%y", "%m/%d/%y"], "12/31/25", datetime(2025, 12, 31),
+           id="second choice"),
+    dtu.pp(["%b %d %Y", "%Y.%m%d"], "Oct 17 2019", datetime(2019, 10, 17),
+           id="strptime directive"),
+    dtu.pp(["%Y.%m%d %H:%M:%S.%f"], "2019.1017 01:02:03.25",
+           datetime(2019, 10, 17, 1, 2, 3, 250000), id="fraction"),
+])
+def test_format_matcher(fmts, spec, exp):
+    """
+    FormatMatcher should pick the same format and produce the same datetime
+    strptime would when the formats are tried in order.
+    """
+    pytest.dbgfunc()
+    assert FormatMatcher(fmts).match(spec) == exp
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("fmts, specs, adaptive, exp", [
+    dtu.pp(["%m/%d/%Y", "%m/%d/%y"], ["1/2/03", "4/5/06"], True,
+           ["%m/%d/%y", "%m/%d/%Y"], id="promote disjoint"),
+    dtu.pp(["%m/%d/%Y", "%m/%d/%y"], ["1/2/03", "4/5/06"], False,
+           ["%m/%d/%Y", "%m/%d/%y"], id="deterministic"),
+    dtu.pp(["%m/%d/%Y", "%m/%d/%y"], ["1/2/03", "1/2/2003", "1/2/2004"],
+           True, ["%m/%d/%Y", "%m/%d/%y"], id="more hits stays ahead"),
+    dtu.pp(["%d/%m/%y", "%m/%d/%y"], ["12/31/25", "12/30/25"], True,
+           ["%d/%m/%y", "%m/%d/%y"], id="overlap keeps precedence"),
+])
+def test_format_matcher_adaptive(fmts, specs, adaptive, exp):
+    """
+    A format that wins more often should be tried earlier, but never ahead of
+    a format that could match the same dtspecs.
+    """
+    pytest.dbgfunc()
+    fmx = FormatMatcher(fmts)
+    fmx.adaptive = adaptive
+    results = [fmx.match(_) for _ in specs]
+    assert None not in results
+    assert fmx.formats_for(specs[0]) == exp
+    assert sum(_[1] for _ in fmx.stats()) == len(specs)
+
+
 # -----------------------------------------------------------------------------
 @pytest.mark.parametrize("tup, itz, otz, exp", [
     dtu.pp((2009, 7, 3), 'est5edt', 'est5edt', "2009-07-03 00:00:00 EDT",
@@ -123,6 +210,278 @@ def test_static_brew_tz(inp, exp):
         assert dt._static_brew_tz(inp) == exp
 
 
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("names, exp", [
+    dtu.pp(['EST5EDT', 'est5edt', 'Est5Edt'],
+           {'hits': 2, 'misses': 1, 'size': 1}, id="case insensitive"),
+    dtu.pp(['EST5EDT', 'America/New_York', 'america/new_york', 'est5edt'],
+           {'hits': 2, 'misses': 2, 'size': 2}, id="aliases"),
+    dtu.pp(['utc', None, 'local', pytz.timezone('utc')],
+           {'hits': 0, 'misses': 1, 'size': 1}, id="names only"),
+])
+def test_zone_cache(names, exp):
+    """
+    Zone names should be resolved through the cache, case insensitively,
+    and resolve to the same object pytz would give us.
+    """
+    pytest.dbgfunc()
+    dtm.zone_cache_clear()
+    zones = [dt._static_brew_tz(_) for _ in names]
+    assert dtm.zone_cache_info() == exp
+    for name, zone in zip(names, zones):
+        if isinstance(name, str) and name != 'local':
+            assert zone is pytz.timezone(name)
+    dtm.zone_cache_clear()
+    assert dtm.zone_cache_info() == {'hits': 0, 'misses': 0, 'size': 0}
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("name", ['US/Eastern', 'Australia/Lord_Howe',
+                                  'Asia/Kolkata', 'EST', 'Etc/GMT+5', 'UTC'])
+def test_zone_table(name):
+    """
+    ZoneTable lookups should agree with what datetime and pytz give us,
+    including the seconds on either side of each transition
+    """
+    pytest.dbgfunc()
+    zone = pytz.timezone(name)
+    table = dtm.ZoneTable.get(zone)
+    assert table is dtm.ZoneTable.get(zone)
+    epochs = list(range(-2000000000, 2000000000, 86400 * 37 + 3601))
+    for start in table.starts[1:]:
+        epochs.extend([start - 1, start])
+    for epoch in epochs:
+        exp = datetime.fromtimestamp(epoch).astimezone(zone)
+        actual = table.datetime(epoch)
+        assert actual == exp
+        assert actual.strftime("%F %T %Z %z") == exp.strftime("%F %T %Z %z")
+        assert table.lookup(epoch) == (exp.utcoffset().total_seconds(),
+                                       exp.tzname())
+    assert dtm.ZoneTable.get(None) is None
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("name", ['US/Eastern', 'Australia/Lord_Howe',
+                                  'Europe/Moscow', 'Europe/Dublin',
+                                  'Asia/Kolkata', 'UTC'])
+def test_wall_offset_many(name):
+    """
+    ZoneTable.wall_offset_many() should give the offset pytz's localize()
+    uses by default (is_dst=False) for every wall time, especially the ones
+    in gaps and overlaps around each transition
+    """
+    pytest.dbgfunc()
+    zone = pytz.timezone(name)
+    table = dtm.ZoneTable.get(zone)
+    walls = list(range(-2000000000, 2000000000, 86400 * 37 + 3601))
+    for idx in range(1, len(table.starts)):
+        for offset in table.offsets[idx - 1:idx + 1]:
+            walls.extend(table.starts[idx] + offset + _
+                         for _ in range(-7200, 7201, 900))
+    walls = [_ for _ in walls if -2200000000 < _ < 4000000000]
+    exp = [int(zone.localize(dtm._epoch_naive + timedelta(seconds=_),
+                             is_dst=False).utcoffset().total_seconds())
+           for _ in walls]
+    assert list(table.wall_offset_many(walls)) == exp
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("fmt, native", [
+    dtu.pp("%F %T %Z %z", True, id="F T Z z"),
+    dtu.pp("%Y.%m%d.%a", True, id="ymdw"),
+    dtu.pp("{%Y} 100%% %H:%M:%S", True, id="braces and percent"),
+    dtu.pp("%F %b", False, id="fallback"),
+    dtu.pp("trailing %", False, id="trailing percent"),
+])
+@pytest.mark.parametrize("itz", ['US/Eastern', 'Asia/Kolkata', 'utc'])
+def test_formatter(fmt, native, itz):
+    """
+    A compiled Formatter should produce what datetime.strftime() would,
+    whether it handles the format natively or passes it along
+    """
+    pytest.dbgfunc()
+    formatter = dtm.Formatter.get(fmt)
+    assert formatter is dtm.Formatter.get(fmt)
+    assert formatter.native == native
+    epochs = list(range(-2500000000, 2500000000, 86400 * 29 + 3599))
+    epochs.extend([1552201199, 1552201200, 1572760799, 1572760800])
+    zone = pytz.timezone(itz)
+    for epoch in epochs:
+        exp = datetime.fromtimestamp(epoch).astimezone(zone).strftime(fmt)
+        assert dt(epoch=epoch).strftime(fmt, tz=itz) == exp
+    assert dtm.Formatter.offset_str(-17762) == "-045602"
+
+
+# -----------------------------------------------------------------------------
+def test_formatter_cache(monkeypatch):
+    """
+    A formatter's day and second caches should stay within their bounds,
+    evict the oldest entries first, and never change the output
+    """
+    pytest.dbgfunc()
+    monkeypatch.setattr(dtm.Formatter, 'day_cache_size', 3)
+    monkeypatch.setattr(dtm.Formatter, 'second_cache_size', 5)
+    formatter = dtm.Formatter("%F %T %Z")
+    zone = pytz.timezone('US/Eastern')
+    epochs = list(range(1572670800, 1572670800 + 5 * 86400, 3599))
+    for epoch in epochs + epochs[-4:]:
+        exp = datetime.fromtimestamp(epoch).astimezone(zone).strftime(
+            "%F %T %Z")
+        assert formatter.format_at(epoch, zone) == exp
+        assert len(formatter._days) <= 3
+        assert len(formatter._seconds) <= 5
+    assert list(formatter._seconds) == [(zone, _) for _ in epochs[-5:]]
+    assert list(formatter._days)[-1][0] == (epochs[-1] - 18000) // 86400
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("engine", ['pytz', 'table', 'zoneinfo'])
+@pytest.mark.parametrize("spec, itz, exp", [
+    dtu.pp("2019-03-10 01:59:59", 'est5edt', "2019-03-10 06:59:59 EST",
+           id="before gap"),
+    dtu.pp("2019-03-10 02:30:00", 'est5edt', "2019-03-10 07:30:00 EDT",
+           id="in gap"),
+    dtu.pp("2019-03-10 03:00:00", 'est5edt', "2019-03-10 07:00:00 EDT",
+           id="after gap"),
+    dtu.pp("2019-11-03 00:59:59", 'est5edt', "2019-11-03 04:59:59 EDT",
+           id="before overlap"),
+    dtu.pp("2019-11-03 01:30:00", 'est5edt', "2019-11-03 06:30:00 EST",
+           id="in overlap"),
+    dtu.pp("2019-04-07 01:45:00", 'Australia/Lord_Howe',
+           "2019-04-06 15:15:00 +1030", id="half hour overlap"),
+    dtu.pp("2019-07-01 12:00:00", 'Asia/Kolkata', "2019-07-01 06:30:00 IST",
+           id="no dst"),
+    dtu.pp("2019-03-31 01:30:00", 'Europe/Dublin', "2019-03-31 01:30:00 IST",
+           id="dublin gap"),
+    dtu.pp("2019-10-27 01:30:00", 'Europe/Dublin', "2019-10-27 00:30:00 IST",
+           id="dublin overlap"),
+    dtu.pp("2014-10-26 01:30:00", 'Europe/Moscow', "2014-10-25 22:30:00 MSK",
+           id="moscow standard overlap"),
+])
+def test_tz_engine_localize(engine, spec, itz, exp):
+    """
+    Each engine should read local times, including ones that are ambiguous
+    or don't exist, the way pytz's localize() does by default
+    """
+    pytest.dbgfunc()
+    try:
+        dtm.set_tz_engine(engine)
+        when = dt(spec, tz=itz)
+        (exp_utc, exp_name) = exp.rsplit(" ", 1)
+        assert when.strftime("%F %T", tz='utc') == exp_utc
+        assert when.strftime("%Z") == exp_name
+        assert dt.parse_many([spec], tz=itz)[0] == when._utc
+    finally:
+        dtm.set_tz_engine('pytz')
+
+
+# -----------------------------------------------------------------------------
+def test_set_tz_engine(monkeypatch):
+    """
+    The engine should come from $DTM_TZ_ENGINE unless set_tz_engine() names
+    one, and switching should resolve zones anew
+    """
+    pytest.dbgfunc()
+    try:
+        monkeypatch.setenv("DTM_TZ_ENGINE", "zoneinfo")
+        engine = dtm.set_tz_engine()
+        assert dtm.tz_engine() is engine
+        assert isinstance(engine, dtm.ZoneinfoEngine)
+        zone = dt._static_brew_tz('us/eastern')
+        assert zone.key == 'US/Eastern'
+        assert repr(dt(epoch=0, tz=zone)) == "dt(0, tz='US/Eastern')"
+
+        assert isinstance(dtm.set_tz_engine('table'), dtm.TableEngine)
+        assert dt._static_brew_tz('us/eastern') is pytz.timezone('US/Eastern')
+
+        with pytest.raises(dt_error) as err:
+            dtm.set_tz_engine('nosuch')
+        assert "unknown tz engine 'nosuch'" in str(err.value)
+
+        with pytest.raises(dt_error) as err:
+            dtm.register_tz_engine('bogus', object)
+        assert "cls must be a TzEngine subclass" in str(err.value)
+
+        class Upper(dtm.PytzEngine):
+            """
+            Resolve every name to UTC
+            """
+            def zone(self, name):
+                """
+                Ignore *name*
+                """
+                return pytz.utc
+        dtm.register_tz_engine('upper', Upper)
+        monkeypatch.setenv("DTM_TZ_ENGINE", "upper")
+        dtm.set_tz_engine()
+        assert dt._static_brew_tz('US/Eastern') is pytz.utc
+
+        class Bare(dtm.TzEngine):
+            """
+            Override nothing
+            """
+        dtm.register_tz_engine('bare', Bare)
+        assert isinstance(dtm.set_tz_engine('bare'), Bare)
+        zone = dt._static_brew_tz('us/eastern')
+        assert zone is pytz.timezone('US/Eastern')
+        assert str(dt("2019.1103 01:30:00", tz=zone)) == (
+            "2019-11-03 01:30:00 EST")
+    finally:
+        dtm._tz_engines.pop('upper', None)
+        dtm._tz_engines.pop('bare', None)
+        monkeypatch.delenv("DTM_TZ_ENGINE")
+        dtm.set_tz_engine()
+
+
+# -----------------------------------------------------------------------------
+def test_local_zone_once(monkeypatch):
+    """
+    The local zone should be looked up once, and again only on request
+    """
+    pytest.dbgfunc()
+    calls = []
+    lookup = tzlocal.get_localzone
+
+    def counted():
+        """
+        Count calls to tzlocal.get_localzone()
+        """
+        calls.append(1)
+        return lookup()
+
+    monkeypatch.setattr(tzlocal, 'get_localzone', counted)
+    dtm.refresh_local_zone()
+    zones = [dt()._tz, dt(epoch=0)._tz, dt(tz='local')._tz,
+             dt("2019.1017")._tz, dt._static_brew_tz(None)]
+    assert len(calls) == 1
+    assert all(_ is zones[0] for _ in zones)
+    dtm.refresh_local_zone()
+    assert len(calls) == 2
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("watch", [
+    dtu.pp(True, id="watching"),
+    dtu.pp(False, id="not watching"),
+])
+def test_watch_local_zone(watch, monkeypatch):
+    """
+    With watch_local_zone() on, a change to $TZ should change the local zone.
+    With it off, the zone we looked up first should stick.
+    """
+    pytest.dbgfunc()
+    before = dt()._tz.zone
+    monkeypatch.setenv('TZ', 'America/Chicago')
+    dtm.watch_local_zone(watch)
+    try:
+        actual = dt()._tz.zone
+    finally:
+        dtm.watch_local_zone(False)
+        monkeypatch.undo()
+        dtm.refresh_local_zone()
+    assert actual == ('America/Chicago' if watch else before)
+
+
 # -----------------------------------------------------------------------------
 @pytest.mark.parametrize("obj, itz, exp", [
     dtu.pp(dt(), pytz.timezone('est5edt'), pytz.timezone('est5edt'),
@@ -154,22 +513,6 @@ def test_brew_tz(obj, itz, exp):
         assert obj._brew_tz(itz) == exp
 
 
-# -----------------------------------------------------------------------------
-@pytest.mark.parametrize("left, right, exp", [
-    dtu.pp(10, 9, 3600, id="positive ordered"),
-    dtu.pp(9, 10, -3600, id="negative ordered"),
-    dtu.pp(0, 23, 3600, id="positive reversed"),
-    dtu.pp(23, 0, -3600, id="negative reversed"),
-])
-def test_delta(left, right, exp):
-    """
-    Tests for _delta
-    """
-    pytest.dbgfunc()
-    q = dt()
-    assert q._delta(left, right) == exp
-
-
 # -----------------------------------------------------------------------------
 @pytest.mark.parametrize("input, itz, exp", [
     dtu.pp(datetime(2019, 3, 10, 1, 59, 59), 'est5edt',
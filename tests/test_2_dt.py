@@ -1,21 +1,31 @@
-from datetime import datetime, timedelta
-from dtm import dt, dt_error, td, version
+import collections
+import concurrent.futures
+import copy
+from datetime import datetime, timedelta, timezone
+import dtm
+from dtm import dt, dt_error, td, version, FormatRegistry
 import dtm_test_utils as dtu
+import functools
 from dtm_test_utils import pp, ppf
+import io
+import pickle
 import pytest
 import pytz
+import sys
 import tbx
 
 
 # -----------------------------------------------------------------------------
 def test_dt_attrs():
     """
-    A dt object should have members _utc and _tz
+    A dt object should have members _utc and _tz (in slots, no __dict__)
     """
     pytest.dbgfunc()
     act = dt()
     assert hasattr(act, '_utc')
     assert hasattr(act, '_tz')
+    assert not hasattr(act, '__dict__')
+    assert sys.getsizeof(act) < 60
 
 
 # -----------------------------------------------------------------------------
@@ -281,6 +291,67 @@ def test_env_dtm_formats(fmts, inp, exp):
         assert a() == exp
 
 
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("env, regs, inp, exp", [
+    pp(None, ["%d.%m.%Y"], "17.10.2019", "2019-10-17-00:00:00",
+       id=ppf("registered format", w=36)),
+    pp(None, ["%Y.%d%m"], "2019.0102", "2019-02-01-00:00:00",
+       id=ppf("registered before defaults", w=36)),
+    pp("%Y.%m%d", ["%Y.%d%m"], "2019.0102", "2019-01-02-00:00:00",
+       id=ppf("$DTM_FORMATS before registered", w=36)),
+    pp(None, [], "17.10.2019",
+       dt_error("None of the formats matched '17.10.2019'"),
+       id=ppf("nothing registered", w=36)),
+    pp(None, [17], "2019.0102",
+       dt_error("register_format: fmt must be a str"),
+       id=ppf("not a format", w=36)),
+])
+def test_register_format(env, regs, inp, exp, monkeypatch):
+    """
+    Formats added with register_format() should be tried after the ones in
+    $DTM_FORMATS and before the defaults.
+    """
+    pytest.dbgfunc()
+    monkeypatch.setattr(dtm, 'format_registry', FormatRegistry(dt._pformats))
+    with tbx.envset(DTM_FORMATS=env):
+        if isinstance(exp, dt_error):
+            with pytest.raises(dt_error) as err:
+                for fmt in regs:
+                    dtm.register_format(fmt)
+                dt(inp)
+            assert str(exp) in str(err.value)
+        else:
+            for fmt in regs:
+                dtm.register_format(fmt)
+            assert dt(inp)() == exp
+
+
+# -----------------------------------------------------------------------------
+def test_format_registry_threads():
+    """
+    Threads parsing dtspecs while formats are being registered and the
+    registry reloaded should always get the right answer.
+    """
+    pytest.dbgfunc()
+    registry = FormatRegistry(dt._pformats)
+    specs = ["2019.1017", "10/17/19", "2019-10-17T00:00:00"] * 500
+
+    def parse(spec):
+        """
+        Parse *spec* with whatever matcher is current
+        """
+        return registry.matcher().match(spec)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        results = pool.map(parse, specs)
+        for count in range(50):
+            registry.register("%d.%m.%Y.{}".format(count))
+            registry.reload()
+        assert all(_ == datetime(2019, 10, 17) for _ in results)
+    assert registry.formats()[0] == "%d.%m.%Y.0"
+    assert registry.formats()[50:] == dt._pformats
+
+
 # -----------------------------------------------------------------------------
 @pytest.mark.parametrize("inp, itz, fmt, exp", [
     dtu.pp("2019.0901 07:32:19", None, "%H:%M:%S, %A, %B %d, %Y",
@@ -298,7 +369,7 @@ def test_env_dtm_str(inp, itz, fmt, exp):
     dt.__str__().
     """
     pytest.dbgfunc()
-    with tbx.envset(DTM_DT_STR=fmt):
+    with dtu.display_env(DTM_DT_STR=fmt):
         nib = dt(inp, tz=itz)
         assert str(nib) == exp
 
@@ -370,7 +441,7 @@ def test_incr(start, kw, argl, exp):
     dtu.pp((2008, 7, 5, 7, 38, 19), dt("2008.0705 07:38:19"), id="tup ymdhms"),
     dtu.pp("2018.0107", dt(2018, 1, 7), id="str ymd"),
     dtu.pp("2001/3/24 19:35", dt(2001, 3, 24, 19, 35), id="str ymdhm"),
-    dtu.pp("1978-12-13T11:45:27Z", dt("1978.1213 11:45:27"),
+    dtu.pp("1978-12-13T11:45:27Z", dt("1978.1213 11:45:27", tz='utc'),
            id="isoformat with Z"),
     dtu.pp("1978-12-13T11:45:27", dt("1978.1213 11:45:27"), id="isoformat"),
     dtu.pp([1], dt_error("single arg must be str,"
@@ -403,6 +474,183 @@ def test_init(inp, exp):
         assert dt(inp) == exp
 
 
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("epoch, itz", [
+    pp(1356933723, 'est5edt', id=ppf("named zone", w=20)),
+    pp(-86400, 'utc', id=ppf("negative", w=20)),
+    pp(0, None, id=ppf("local zone", w=20)),
+])
+def test_from_epoch(epoch, itz):
+    """
+    dt.from_epoch() should build the same object dt(epoch=...) does
+    """
+    pytest.dbgfunc()
+    zone = dt._static_brew_tz(itz) if itz else None
+    quick = dt.from_epoch(epoch, zone)
+    slow = dt(epoch=epoch, tz=itz)
+    assert type(quick) is dt
+    assert quick == slow and quick._tz is slow._tz
+    assert repr(quick) == repr(slow) and str(quick) == str(slow)
+    later = quick + td(h=1)
+    assert type(later._utc) is int and later == dt(epoch=epoch + 3600)
+    assert (later - quick) == td(3600)
+
+
+# -----------------------------------------------------------------------------
+def test_arith_keeps_zone(monkeypatch):
+    """
+    Arithmetic on a dt should hand the result the same zone object, without
+    looking up the local zone
+    """
+    pytest.dbgfunc()
+    when = dt("2019.0610 12:00:00", tz='Asia/Kolkata')
+
+    def no_lookup():
+        """
+        Complain if the local zone is wanted
+        """
+        pytest.fail("arithmetic looked up the local zone")
+
+    monkeypatch.setattr(dt, '_local_zone', staticmethod(no_lookup))
+    results = [when + 60, 60 + when, when + td(60), td(60) + when,
+               when + timedelta(seconds=60), when - 60, when - td(60),
+               when - timedelta(seconds=60), when.next_day(),
+               when.previous_day(2), when.increment(1), when.decrement(1)]
+    for result in results:
+        assert result._tz is when._tz
+    assert str(when.next_day()) == "2019-06-11 12:00:00 IST"
+    assert str(when - td(h=6)) == "2019-06-10 06:00:00 IST"
+
+
+# -----------------------------------------------------------------------------
+def test_dt_hash():
+    """
+    Equal dt objects should hash alike, so they can key dicts and sets, and
+    dt objects should not be modifiable
+    """
+    pytest.dbgfunc()
+    first = dt(epoch=1356933723, tz='est5edt')
+    second = dt("2012.1231 06:02:03", tz='utc')
+    assert first == second and hash(first) == hash(second)
+    assert len({first, second, dt(epoch=0)}) == 2
+    assert {first: 'x'}[second] == 'x'
+    assert {1356933723: 'x', first: 'y'}[first] == 'y'
+    aware = datetime(2012, 12, 31, 6, 2, 3, tzinfo=timezone.utc)
+    assert first == aware and hash(first) == hash(aware)
+    assert hash(first) == hash(aware.astimezone(pytz.timezone('Asia/Tokyo')))
+    assert {aware: 'x'}[first] == 'x'
+    for epoch in (-1, -62135596800, 1572759000, 253402300799):
+        aware = datetime.fromtimestamp(epoch, timezone.utc)
+        assert hash(dt(epoch=epoch)) == hash(aware)
+    far = dt(epoch=10 ** 12)
+    assert hash(far) == hash(dt(epoch=10 ** 12, tz='utc'))
+    cached = functools.lru_cache()(lambda when: when.ymd())
+    assert cached(first) == cached(second) == "2012.1231"
+    assert cached.cache_info().hits == 1
+    for name in ['_utc', '_tz', 'other']:
+        with pytest.raises(AttributeError) as err:
+            setattr(first, name, 0)
+        assert "dt objects are immutable" in str(err.value)
+    with pytest.raises(AttributeError):
+        del first._utc
+    for twin in [copy.copy(first), pickle.loads(pickle.dumps(first))]:
+        assert twin == first and repr(twin) == repr(first)
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("specs, fmt, itz, exp", [
+    pp(["2019.0310 01:59:59", "2019.0310 03:00:00", "03/10/19"], None,
+       'est5edt', [1552201199, 1552201200, 1552194000],
+       id=ppf("default formats", w=30)),
+    pp(iter(["2016-09-28T16:46:42Z"]), None, 'utc', [1475081202],
+       id=ppf("iterator", w=30)),
+    pp(["2013.0310 02:00:00", "2013.0310 07:00:00"], "%Y.%m%d %H:%M:%S",
+       'est5edt', [1362898800, 1362913200], id=ppf("explicit format", w=30)),
+    pp([], None, None, [], id=ppf("empty", w=30)),
+    pp(["2019.0310", "2019/0310"], "%Y.%m%d", 'utc',
+       dt_error("None of the formats matched '2019/0310'"),
+       id=ppf("no match", w=30)),
+])
+def test_parse_many(specs, fmt, itz, exp):
+    """
+    dt.parse_many() should produce the epochs dt() would for each dtspec
+    """
+    pytest.dbgfunc()
+    if isinstance(exp, dt_error):
+        with pytest.raises(dt_error) as err:
+            dt.parse_many(specs, fmt=fmt, tz=itz)
+        assert str(exp) in str(err.value)
+    else:
+        actual = dt.parse_many(specs, fmt=fmt, tz=itz)
+        assert len(actual) == len(exp)
+        assert [int(_) for _ in actual] == exp
+
+
+# -----------------------------------------------------------------------------
+def test_parse_many_matcher_cache(monkeypatch):
+    """
+    The compiled matchers behind dt.parse_many(fmt=...) should be reused, and
+    no more than 256 of them kept
+    """
+    pytest.dbgfunc()
+    monkeypatch.setattr(dt, '_matchers', collections.OrderedDict())
+    first = dt._matcher(["%Y.%m%d"])
+    assert dt._matcher(("%Y.%m%d",)) is first
+    for idx in range(300):
+        fmt = "%Y.%m%d {}".format(idx)
+        assert dt.parse_many(["2019.0310 {}".format(idx)], fmt=fmt,
+                             tz='utc')[0] == 1552176000
+    assert len(dt._matchers) == 256
+    assert ("%Y.%m%d",) not in dt._matchers
+    assert ("%Y.%m%d 299",) in dt._matchers
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("epochs, itz, exp", [
+    pp([1552201199, 1552201200, 1572760799, 1572760800], 'est5edt',
+       [-18000, -14400, -14400, -18000], id=ppf("dst edges", w=30)),
+    pp(iter([0, 86400]), 'utc', [0, 0], id=ppf("iterator", w=30)),
+    pp([1516215600], 'Asia/Kolkata', [19800], id=ppf("half hour", w=30)),
+    pp([-2208988800], 'US/Eastern', [-17760], id=ppf("lmt", w=30)),
+    pp([], 'est5edt', [], id=ppf("empty", w=30)),
+])
+def test_localize_many(epochs, itz, exp):
+    """
+    dtm.localize_many() should find the offset in effect at each epoch and
+    return either the offsets or the local wall clock seconds
+    """
+    pytest.dbgfunc()
+    epochs = list(epochs)
+    actual = dtm.localize_many(epochs, tz=itz, offsets=True)
+    assert [int(_) for _ in actual] == exp
+    actual = dtm.localize_many(iter(epochs), tz=itz)
+    assert len(actual) == len(exp)
+    assert [int(_) for _ in actual] == [e + o for e, o in zip(epochs, exp)]
+    for epoch, wall in zip(epochs, actual):
+        assert dt(epoch=epoch).strftime("%F %T", tz=itz) == \
+            dt(epoch=int(wall)).strftime("%F %T", tz='utc')
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("fmt", ["%F-%T", "%Y.%m%d.%a %Z%z", "%b %d %Y"])
+@pytest.mark.parametrize("itz", ['est5edt', 'Asia/Kolkata'])
+def test_format_many(fmt, itz):
+    """
+    dtm.format_many() should produce what dt.strftime() would for each epoch,
+    as a list or written to a file
+    """
+    pytest.dbgfunc()
+    epochs = list(range(1552190000, 1552215000, 997))
+    epochs.extend([1572760799, 1572760800, -2208988800, 0])
+    exp = [dt(epoch=_).strftime(fmt, tz=itz) for _ in epochs]
+    assert dtm.format_many(epochs, fmt, tz=itz) == exp
+    assert dtm.format_many(dtm.int64_array(epochs), fmt, tz=itz) == exp
+    buf = io.StringIO()
+    assert dtm.format_many(iter(epochs), fmt, tz=itz, out=buf) == len(exp)
+    assert buf.getvalue() == "".join(_ + "\n" for _ in exp)
+    assert dtm.format_many([], fmt, tz=itz) == []
+
+
 # -----------------------------------------------------------------------------
 @pytest.mark.parametrize("inp, itz, otz, exp", [
     dtu.pp(1552197600, 'utc', 'utc', "2019-03-10 06:00:00 UTC+0000",
@@ -971,6 +1219,214 @@ def test_dt_range():
         last = day
 
 
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("start, stop, step, exp", [
+    pp("2019.0301 02:30:00", "2019.0401", 1,
+       (31, "2019-03-04 02:30:00 EST", "2019-03-31 02:30:00 EDT"),
+       id=ppf("days across spring gap", "T", w=40)),
+    pp("2019.1101 01:30:00", "2019.1105 01:30:00", 1,
+       (5, "2019-11-04 01:30:00 EST", "2019-11-05 01:30:00 EST"),
+       id=ppf("days across fall overlap", "T", w=40)),
+    pp("2019.1105", "2019.1101", -1,
+       (5, "2019-11-02 00:00:00 EDT", "2019-11-01 00:00:00 EDT"),
+       id=ppf("days backward", "T", w=40)),
+    pp("2019.0310", "2019.0310 06:00:00", td(minutes=15),
+       (21, "2019-03-10 00:45:00 EST", "2019-03-10 06:00:00 EDT"),
+       id=ppf("15 minutes", "T", w=40)),
+    pp("1970.0101", "2070.0101", td(hours=1),
+       (876601, "1970-01-01 03:00:00 EST", "2070-01-01 00:00:00 EST"),
+       id=ppf("century of hours", "T", w=40)),
+    pp("2019.0105", "2019.0101", 1, (0, None, None),
+       id=ppf("empty", "T", w=40)),
+    pp("2019.0101", "2019.0105", 0, dt_error("step must not be zero"),
+       id=ppf("zero step", "X", w=40)),
+    pp("2019.0101", "2019.0105", 1.5,
+       dt_error("step must be an int (days) or a td"),
+       id=ppf("float step", "X", w=40)),
+])
+def test_date_range(start, stop, step, exp):
+    """
+    A DateRange should know its length and elements without iterating and
+    agree with itself however it's read
+    """
+    pytest.dbgfunc()
+    zone = "America/New_York"
+    if isinstance(exp, dt_error):
+        with pytest.raises(dt_error) as err:
+            dtm.DateRange(dt(start, tz=zone), dt(stop, tz=zone), step)
+        assert str(exp) in str(err.value)
+        return
+    rng = dtm.DateRange(dt(start, tz=zone), dt(stop, tz=zone), step)
+    count, third, last = exp
+    assert len(rng) == count
+    if count:
+        assert str(rng[3]) == third
+        assert str(rng[-1]) == last
+        assert rng[3] in rng
+        assert rng[-1] in rng
+    with pytest.raises(IndexError):
+        rng[count]
+    if count < 1000:
+        items = list(rng)
+        assert items == list(rng)
+        assert list(reversed(rng)) == items[::-1]
+        assert list(rng[1::3]) == items[1::3]
+        assert list(rng[::-2]) == items[::-2]
+        assert list(rng.epochs()) == [_._utc for _ in items]
+        for item in items[:-1]:
+            assert item + 1 not in rng
+    assert "never" not in rng
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("step, span, count", [
+    pp(1, 3 * 86400 + 3600, 4, id="days"),
+    pp(-1, -3 * 86400, 4, id="days backward"),
+    pp(td(minutes=30), 7200, 5, id="half hours"),
+])
+def test_date_range_fall_back_start(step, span, count):
+    """
+    A DateRange starting in the first copy of a repeated fall hour should
+    start at that moment, not at the wall clock's standard time reading
+    """
+    pytest.dbgfunc()
+    start = dt(epoch=1572759000, tz='America/New_York')
+    assert str(start) == "2019-11-03 01:30:00 EDT"
+    assert list(start.dt_range(start)) == [start]
+    rng = dtm.DateRange(start, start + span, step)
+    assert len(rng) == count
+    assert rng[0] == rng.start == start
+    assert start in rng
+    assert list(rng.epochs()) == [_._utc for _ in rng]
+    assert list(rng[::-1])[-1] == start
+    assert list(rng[::-1].epochs())[-1] == start._utc
+    assert all(_ in rng for _ in rng[::-1])
+
+
+# -----------------------------------------------------------------------------
+def test_dt_range_reuse():
+    """
+    dt_range() returns a DateRange, which is sized and can be iterated more
+    than once
+    """
+    pytest.dbgfunc()
+    days = dt("1990.0101").dt_range(dt("2030.0101"))
+    assert isinstance(days, dtm.DateRange)
+    assert len(days) == 14611
+    assert days[-1] == dt("2030.0101")
+    assert days.start == dt("1990.0101")
+    assert days.stop == dt("2030.0101")
+    assert days.step == 1
+    assert dt("2000.0101") in days
+    assert dt("2000.0101 00:00:01") not in days
+    assert len(days[::7]) == 2088
+    assert sum(1 for _ in days[:10]) == sum(1 for _ in days[:10]) == 10
+    exp = "DateRange({!r}, {!r}, 1)".format(days[0], days[1])
+    assert repr(days[:2]) == exp
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("start, stop, step, itz, exp", [
+    pp("2019.0310", "2019.0310 04:00:00", td(hours=1), 'America/New_York',
+       ["2019-03-10 00:00:00 EST", "2019-03-10 01:00:00 EST",
+        "2019-03-10 03:00:00 EDT", "2019-03-10 04:00:00 EDT"],
+       id=ppf("hours across spring gap", w=40)),
+    pp("2019.1103 00:30:00", "2019.1103 02:00:00", td(minutes=30),
+       'America/New_York',
+       ["2019-11-03 00:30:00 EDT", "2019-11-03 01:00:00 EDT",
+        "2019-11-03 01:30:00 EDT", "2019-11-03 01:00:00 EST",
+        "2019-11-03 01:30:00 EST", "2019-11-03 02:00:00 EST"],
+       id=ppf("half hours across fall overlap", w=40)),
+    pp("2019.0301 02:30:00", "2019.0331", 7, 'America/New_York',
+       ["2019-03-01 02:30:00 EST", "2019-03-08 02:30:00 EST",
+        "2019-03-15 02:30:00 EDT", "2019-03-22 02:30:00 EDT",
+        "2019-03-29 02:30:00 EDT"],
+       id=ppf("weekly across dst", w=40)),
+    pp(dt("2019.0303 02:30:00", tz='US/Central'), "2019.0317 03:30:00", 7,
+       'America/New_York',
+       ["2019-03-03 03:30:00 EST", "2019-03-10 03:30:00 EDT",
+        "2019-03-17 03:30:00 EDT"],
+       id=ppf("dt start in another zone", w=40)),
+    pp("2019.0310 02:00:00", "2019.0310 01:00:00", td(hours=1), 'UTC', [],
+       id=ppf("empty", w=40)),
+])
+def test_date_grid(start, stop, step, itz, exp):
+    """
+    dtm.date_grid() should produce the epochs of a DateRange in zone *itz*
+    as an int64 array, with day steps on the wall clock and td steps exact
+    """
+    pytest.dbgfunc()
+    grid = dtm.date_grid(start, stop, step, tz=itz)
+    assert [str(dt(epoch=int(_), tz=itz)) for _ in grid] == exp
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("engine", ['pytz', 'zoneinfo'])
+def test_dt_array(engine):
+    """
+    A DtArray should do in bulk what its elements would do one by one, in 8
+    bytes per moment
+    """
+    pytest.dbgfunc()
+    try:
+        dtm.set_tz_engine(engine)
+        zone = 'America/New_York'
+        grid = dtm.date_grid("2019.0301 02:30:00", "2019.1110", 3, tz=zone)
+        arr = dtm.DtArray(grid, tz=zone)
+        items = [dt(epoch=int(_), tz=zone) for _ in grid]
+        assert len(arr) == len(items) == 85
+        assert arr.epochs().itemsize == 8
+        assert list(arr) == items
+        assert arr[-1] == items[-1]
+        assert list(arr[5:20:4]) == items[5:20:4]
+        assert list(dtm.DtArray.from_dts(items)) == items
+        assert arr.strftime("%F %T %Z") == [str(_) for _ in items]
+        assert arr.weekday() == [_.weekday() for _ in items]
+        assert arr.weekday('Asia/Tokyo') == [_.weekday('Asia/Tokyo')
+                                             for _ in items]
+        assert list(arr.next_day(10)) == [_.next_day(10) for _ in items]
+        assert list(arr.previous_day(3)) == [_.previous_day(3)
+                                             for _ in items]
+        assert list(arr + td(hours=1)) == [_ + td(hours=1) for _ in items]
+        assert list(td(60) + arr) == [_ + 60 for _ in items]
+        assert list(arr - timedelta(days=1)) == [_ - 86400 for _ in items]
+        assert list(arr + 90.7) == [_ + 90.7 for _ in items]
+        assert list(arr - 45.9) == [_ - 45.9 for _ in items]
+        pivot = items[40]
+        assert list(arr < pivot) == [_ < pivot for _ in items]
+        assert list(arr >= pivot) == [_ >= pivot for _ in items]
+        assert list(arr == arr.next_day(0)) == [True] * len(items)
+        assert list(arr != items[0]) == [False] + [True] * (len(items) - 1)
+        gaps = arr[1:] - arr[:-1]
+        assert isinstance(gaps, dtm.TdArray)
+        assert list(gaps) == [b - a for a, b in zip(items, items[1:])]
+        assert list(arr - items[0]) == [_ - items[0] for _ in items]
+        assert list(arr[:-1] + gaps) == items[1:]
+        assert list(arr[1:] - gaps) == items[:-1]
+        assert repr(arr[:2]) == "DtArray([{}, {}], tz='{}')".format(
+            items[0]._utc, items[1]._utc, zone)
+    finally:
+        dtm.set_tz_engine('pytz')
+
+
+# -----------------------------------------------------------------------------
+def test_dt_array_errors():
+    """
+    DtArray should refuse operands it can't handle
+    """
+    pytest.dbgfunc()
+    arr = dtm.DtArray([0, 86400, 172800], tz='utc')
+    with pytest.raises(TypeError) as err:
+        arr < 17
+    assert "<DtArray> and <class 'int'>" in str(err.value)
+    with pytest.raises(TypeError):
+        arr + dt()
+    with pytest.raises(dt_error) as err:
+        arr == arr[:2]
+    assert "DtArray lengths differ" in str(err.value)
+    assert len(dtm.DtArray()) == 0
+
+
 # -----------------------------------------------------------------------------
 @pytest.mark.parametrize("nub, ndargs, exp", [
     dtu.pp(dt(2012, 12, 31), (), dt(2013, 1, 1), id="year"),
@@ -1087,6 +1543,47 @@ def test_previous_day_pp(nub, pvargs, exp):
     assert nub.previous_day(*pvargs) == exp
 
 
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("start, itz, count, exp", [
+    pp("2019.0309 02:30:00", 'est5edt', 1, "2019-03-10 03:30:00 EDT",
+       id=ppf("into gap", w=25)),
+    pp("2019.1102 01:30:00", 'est5edt', 1, "2019-11-03 01:30:00 EST",
+       id=ppf("into overlap", w=25)),
+    pp("2019.1104 01:30:00", 'est5edt', -1, "2019-11-03 01:30:00 EST",
+       id=ppf("back into overlap", w=25)),
+    pp("2019.0310 12:00:00", 'est5edt', 3650, "2029-03-07 12:00:00 EST",
+       id=ppf("ten years", w=25)),
+    pp("2019.0310 12:00:00", 'Australia/Sydney', -3650,
+       "2009-03-12 12:00:00 AEDT", id=ppf("ten years back", w=25)),
+    pp("2019.0310 12:00:00", 'utc', 0, "2019-03-10 12:00:00 UTC",
+       id=ppf("no move", w=25)),
+    pp("2019.0330 01:30:00", 'Europe/Dublin', 1, "2019-03-31 02:30:00 IST",
+       id=ppf("dublin gap", w=25)),
+    pp("2019.1026 01:30:00", 'Europe/Dublin', 1, "2019-10-27 01:30:00 IST",
+       id=ppf("dublin overlap", w=25)),
+    pp("2014.1027 01:30:00", 'Europe/Moscow', -1, "2014-10-26 01:30:00 MSK",
+       id=ppf("moscow overlap", w=25)),
+])
+@pytest.mark.parametrize("engine", ['pytz', 'table', 'zoneinfo'])
+def test_shift_days(start, itz, count, exp, engine):
+    """
+    next_day() and previous_day() should move the local date and keep the
+    local time in one step, with DST dealt with at the end point
+    """
+    pytest.dbgfunc()
+    try:
+        dtm.set_tz_engine(engine)
+        when = dt(start, tz=itz)
+        if 0 <= count:
+            moved = when.next_day(count)
+        else:
+            moved = when.previous_day(-count)
+        assert str(moved) == exp
+        assert moved == dt(moved.strftime("%Y.%m%d %H:%M:%S"), tz=itz)
+    finally:
+        dtm.set_tz_engine('pytz')
+
+
 # -----------------------------------------------------------------------------
 @pytest.mark.parametrize("when, env_fmt, exp", [
     dtu.pp(dt(2012, 12, 31, 1, 2, 3, tz="EST5EDT"), None,
@@ -1103,7 +1600,7 @@ def test_repr(when, env_fmt, exp):
     repr(dt()) should produce a predictable string
     """
     pytest.dbgfunc()
-    with tbx.envset(DTM_DT_REPR=env_fmt):
+    with dtu.display_env(DTM_DT_REPR=env_fmt):
         assert repr(when) == exp
 
 
@@ -1124,10 +1621,32 @@ def test_str(inp, env_fmt, exp):
     ref in utc to show the actual contents of the object.
     """
     pytest.dbgfunc()
-    with tbx.envset(DTM_DT_STR=env_fmt):
+    with dtu.display_env(DTM_DT_STR=env_fmt):
         assert str(inp) == exp
 
 
+# -----------------------------------------------------------------------------
+def test_reload_display(monkeypatch):
+    """
+    Changes to $DTM_DT_STR and $DTM_DT_REPR should only be seen after
+    dtm.reload_display()
+    """
+    pytest.dbgfunc()
+    when = dt(epoch=1356933723, tz='est5edt')
+    try:
+        monkeypatch.setenv("DTM_DT_STR", "%Y.%m%d")
+        monkeypatch.setenv("DTM_DT_REPR", "%H:%M")
+        assert str(when) == "2012-12-31 01:02:03 EST"
+        assert repr(when) == "dt(1356933723, tz='EST5EDT')"
+        dtm.reload_display()
+        assert str(when) == "2012.1231"
+        assert repr(when) == "01:02"
+    finally:
+        monkeypatch.undo()
+        dtm.reload_display()
+    assert str(when) == "2012-12-31 01:02:03 EST"
+
+
 # -----------------------------------------------------------------------------
 @pytest.mark.parametrize("when, fmt, tzone, exp", [
     dtu.pp(dt(2000, 12, 1), "%Y.%m%d %H:%M:%S", None, "2000.1201 00:00:00",
@@ -1345,6 +1864,55 @@ def test_weekday_floor(when, wkday, exp):
         assert when.weekday_floor(wkday) == exp
 
 
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("start, itz, meth, wkday, exp", [
+    pp("2019.0307 12:00:00", "America/New_York", "next_weekday", "mon",
+       "2019-03-11 12:00:00 EDT", id=ppf("next mon across dst", "T", w=35)),
+    pp("2019.1104 00:30:00", "America/New_York", "last_weekday", "sat",
+       "2019-11-02 00:30:00 EDT", id=ppf("last sat across dst", "T", w=35)),
+    pp("2012.0704 23:30:00", "Pacific/Auckland", "weekday_ceiling", "wed",
+       "2012-07-04 23:30:00 NZST", id=ppf("ceiling is today", "T", w=35)),
+    pp("2012.0704 00:30:00", "Pacific/Midway", "weekday_floor", "sun",
+       "2012-07-01 00:30:00 SST", id=ppf("floor in midway", "T", w=35)),
+    pp("2012.0704", None, "weekday_ceiling", "wednesday",
+       dt_error("one of the targets is not a valid weekday"),
+       id=ppf("ceiling bad name", "X", w=35)),
+    pp("2012.0704", None, "weekday_floor", [],
+       dt_error("no target weekday given"),
+       id=ppf("floor no targets", "X", w=35)),
+])
+def test_weekday_jump(start, itz, meth, wkday, exp):
+    """
+    The weekday methods work from the weekday index in the object's own zone
+    and land in one day shift. Bad or missing targets fail rather than
+    scanning forever.
+    """
+    pytest.dbgfunc()
+    when = dt(start, tz=itz)
+    if isinstance(exp, dt_error):
+        with pytest.raises(dt_error) as err:
+            getattr(when, meth)(wkday)
+        assert str(exp) in str(err.value)
+    else:
+        assert str(getattr(when, meth)(wkday)) == exp
+
+
+# -----------------------------------------------------------------------------
+def test_weekday_every_day():
+    """
+    weekday() should agree with datetime over a long run of days, whatever
+    the locale would call them
+    """
+    pytest.dbgfunc()
+    wkdl = dt().weekday_list()
+    start = dt("1969.1225 06:00:00", tz="Australia/Lord_Howe")
+    for count in range(0, 4000, 7 * 13 + 1):
+        when = start.next_day(count)
+        exp = datetime.fromtimestamp(when._utc,
+                                     pytz.timezone("Australia/Lord_Howe"))
+        assert when.weekday() == wkdl[exp.weekday()]
+
+
 # -----------------------------------------------------------------------------
 @pytest.mark.parametrize("when", [
     pp("2001.0719", id=ppf("2001.0719", "T", w=51)),
@@ -1,8 +1,11 @@
+import copy
 from datetime import datetime, timedelta
-from dtm import dt, dt_error, td
+from dtm import dt, dt_error, td, TdArray
 from dtm_test_utils import pp, ppf
 import dtm_test_utils as dtu
+import pickle
 import pytest
+import sys
 
 
 # -----------------------------------------------------------------------------
@@ -12,6 +15,44 @@ def test_td_attrs():
     """
     a = td()
     assert hasattr(a, '_duration')
+    assert not hasattr(a, '__dict__')
+    assert sys.getsizeof(a) < 60
+
+
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("seconds", [0, 3661, -45])
+def test_from_seconds(seconds):
+    """
+    td.from_seconds() should build the same object td(...) does
+    """
+    pytest.dbgfunc()
+    quick = td.from_seconds(seconds)
+    assert type(quick) is td
+    assert quick == td(seconds) and str(quick) == str(td(seconds))
+    assert (quick + td(5))._duration == seconds + 5
+    assert (quick * 2)._duration == 2 * seconds
+
+
+# -----------------------------------------------------------------------------
+def test_td_hash():
+    """
+    Equal td objects should hash alike (and like the equal number of
+    seconds, not the equal timedelta), so they can key dicts and sets, and
+    td objects should not be modifiable
+    """
+    pytest.dbgfunc()
+    first = td(1, 0, 0)
+    assert first == td(3600) and hash(first) == hash(td(3600))
+    assert hash(first) == hash(3600)
+    assert len({first, td(h=1), td(5)}) == 2
+    assert {first: 'x'}[td(m=60)] == 'x'
+    with pytest.raises(AttributeError) as err:
+        first._duration = 5
+    assert "td objects are immutable" in str(err.value)
+    with pytest.raises(AttributeError):
+        del first._duration
+    for twin in [copy.copy(first), pickle.loads(pickle.dumps(first))]:
+        assert twin == first
 
 
 # -----------------------------------------------------------------------------
@@ -769,6 +810,87 @@ def test_td_dhms(inp, exp):
     assert obj.dhms() == exp
 
 
+# -----------------------------------------------------------------------------
+def test_td_array():
+    """
+    A TdArray should do in bulk what its elements would do one by one
+    """
+    pytest.dbgfunc()
+    secs = [0, 1, 59, 3600, 17991, -90061, 756914, -1, 86400 * 400 + 7]
+    items = [td(_) for _ in secs]
+    arr = TdArray(secs)
+    assert len(arr) == len(items)
+    assert arr.seconds().itemsize == 8
+    assert list(arr) == items
+    assert arr[-2] == items[-2]
+    assert list(arr[1::3]) == items[1::3]
+    assert list(TdArray.from_tds(items)) == items
+    assert list(TdArray(iter(secs))) == items
+    assert arr.dhhmmss() == [_.dhhmmss() for _ in items]
+    assert arr.dhms() == [_.dhms() for _ in items]
+    assert list(arr + td(90)) == [_ + td(90) for _ in items]
+    assert list(timedelta(seconds=30) + arr) == [_ + 30 for _ in items]
+    assert list(arr - 45) == [_ - 45 for _ in items]
+    assert list(td(100) - arr) == [td(100) - _ for _ in items]
+    assert list(arr + arr) == [_ + _ for _ in items]
+    for num in [90.7, -45.9, 0.5]:
+        assert list(arr + num) == [_ + num for _ in items]
+        assert list(num + arr) == [num + _ for _ in items]
+        assert list(arr - num) == [_ - num for _ in items]
+        assert list(num - arr) == [num - _ for _ in items]
+    assert list(arr * 3) == [_ * 3 for _ in items]
+    assert list(2.5 * arr) == [_ * 2.5 for _ in items]
+    assert list(arr / 7) == [_ / 7 for _ in items]
+    assert list(arr // 7) == [_ // 7 for _ in items]
+    assert list(arr % 60) == [_ % 60 for _ in items]
+    assert list(arr // td(hours=1)) == [_._duration // 3600 for _ in items]
+    assert list(arr % td(hours=1)) == [td(_._duration % 3600) for _ in items]
+    (quo, rem) = divmod(arr, td(minutes=1))
+    assert [q * 60 + r._duration for q, r in zip(quo, rem)] == secs
+    assert list(arr < td(60)) == [_ < td(60) for _ in items]
+    assert list(arr >= 59.5) == [_ >= 59.5 for _ in items]
+    assert list(arr == arr) == [True] * len(items)
+    assert list(arr != 0) == [_ != 0 for _ in items]
+    assert arr.sum() == td(sum(secs))
+    assert arr.min() == td(-90061)
+    assert arr.max() == td(86400 * 400 + 7)
+    assert arr.mean() == td(round(sum(secs) / len(secs)))
+    assert repr(arr[:3]) == "TdArray([0, 1, 59])"
+
+
+# -----------------------------------------------------------------------------
+def test_td_array_errors():
+    """
+    TdArray should refuse operands it can't handle and reductions of nothing
+    """
+    pytest.dbgfunc()
+    arr = TdArray([1, 2, 3])
+    with pytest.raises(TypeError) as err:
+        arr < "x"
+    assert "<TdArray> and <class 'str'>" in str(err.value)
+    with pytest.raises(TypeError):
+        arr * td(3)
+    with pytest.raises(TypeError):
+        divmod(arr, "x")
+    with pytest.raises(dt_error) as err:
+        arr + arr[:2]
+    assert "TdArray lengths differ" in str(err.value)
+    for divisor in [0, 0.0, td(0), timedelta(0), TdArray([3, 0, 1])]:
+        with pytest.raises(ZeroDivisionError):
+            arr // divisor
+        with pytest.raises(ZeroDivisionError):
+            arr % divisor
+        with pytest.raises(ZeroDivisionError):
+            divmod(arr, divisor)
+    with pytest.raises(ZeroDivisionError):
+        TdArray([5, -6, 0]) / 0
+    assert TdArray().sum() == td(0)
+    for name in ['min', 'max', 'mean']:
+        with pytest.raises(dt_error) as err:
+            getattr(TdArray(), name)()
+        assert "{}() of an empty TdArray".format(name) in str(err.value)
+
+
 """
 ==TAGGABLE==
 """
@@ -4,9 +4,12 @@ Tests for code in dtm/__main__.py
 from dtm import dt, td
 import dtm.__main__ as dtmain
 import dtm_test_utils as dtu
+import os
 import pytest
 import pytz
 import re
+import subprocess
+import sys
 
 
 # -----------------------------------------------------------------------------
@@ -304,6 +307,28 @@ def test_westeast(capsys):
     assert "Pacific/Kiritimati" in out
 
 
+# -----------------------------------------------------------------------------
+def test_import_time():
+    """
+    Importing dtm and its command line module should not import pytz,
+    tzlocal, numpy, or pdb, and should take a few milliseconds. The limit
+    below is generous so a slow machine won't trip it, but it will catch any
+    of the heavy modules being imported eagerly again.
+    """
+    pytest.dbgfunc()
+    heavy = ['pytz', 'tzlocal', 'numpy', 'pdb']
+    code = ("import dtm.__main__, sys; "
+            "print([_ for _ in {} if _ in sys.modules])".format(heavy))
+    root = os.path.dirname(os.path.dirname(dtmain.__file__))
+    env = dict(os.environ, PYTHONPATH=root)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            env=env, capture_output=True, text=True)
+    assert result.stdout.strip() == "[]"
+    cumulative = [int(_.split("|")[1]) for _ in result.stderr.split("\n")
+                  if _.endswith("| dtm.__main__")]
+    assert cumulative and cumulative[0] < 50000
+
+
 """
 ==TAGGABLE==
 """